@@ -15,6 +15,7 @@ def _ml_paths():
     return {
         "model": os.path.join(root, "ml", "models", "parking_model.pkl"),
         "data_dir": os.path.join(root, "ml", "data", "processed"),
+        "registry": os.path.join(root, "ml", "models", "registry"),
     }
 
 
@@ -36,6 +37,32 @@ class Settings(BaseSettings):
     USE_ML_MODEL: bool = os.getenv("USE_ML_MODEL", "true").lower() in ("true", "1", "yes")
     ML_MODEL_PATH: str = os.getenv("ML_MODEL_PATH", _ml_paths()["model"])
     ML_DATA_DIR: str = os.getenv("ML_DATA_DIR", _ml_paths()["data_dir"])
+    # Versioned models; when it has an ACTIVE version it takes precedence over ML_MODEL_PATH
+    ML_REGISTRY_DIR: str = os.getenv("ML_REGISTRY_DIR", _ml_paths()["registry"])
+    # Seconds between checks for an ACTIVE version set by another worker (0 = never follow)
+    ML_ACTIVE_CHECK_INTERVAL_S: float = float(os.getenv("ML_ACTIVE_CHECK_INTERVAL_S", "5"))
+    # Comma-separated usernames allowed to call admin endpoints such as POST /ml-reload
+    ADMIN_USERNAMES: str = os.getenv("ADMIN_USERNAMES", "")
+    # Load only the last N weeks of parking history (0 = all of it)
+    ML_HISTORY_WEEKS: int = int(os.getenv("ML_HISTORY_WEEKS", "0"))
+    
+    # Bounded thread pool for prediction calls, so inference never blocks the event loop
+    INFERENCE_MAX_WORKERS: int = int(os.getenv("INFERENCE_MAX_WORKERS", "4"))
+    INFERENCE_MAX_QUEUE: int = int(os.getenv("INFERENCE_MAX_QUEUE", "64"))
+    INFERENCE_TIMEOUT_S: float = float(os.getenv("INFERENCE_TIMEOUT_S", "10"))
+    # Worker processes sharing the memory-mapped model and history (0 = score in-process)
+    INFERENCE_PROCESSES: int = int(os.getenv("INFERENCE_PROCESSES", "0"))
+    # Largest number of slots a single POST /predict/batch may request
+    PREDICT_BATCH_MAX_ITEMS: int = int(os.getenv("PREDICT_BATCH_MAX_ITEMS", "2000"))
+    # POST /predict responses, keyed by request, zone events and model generation
+    PREDICT_CACHE_SIZE: int = int(os.getenv("PREDICT_CACHE_SIZE", "4096"))
+    PREDICT_CACHE_TTL_S: float = float(os.getenv("PREDICT_CACHE_TTL_S", "300"))
+    # Computed heatmaps, keyed by date, zones and model generation
+    HEATMAP_CACHE_SIZE: int = int(os.getenv("HEATMAP_CACHE_SIZE", "64"))
+    HEATMAP_CACHE_TTL_S: float = float(os.getenv("HEATMAP_CACHE_TTL_S", "900"))
+    
+    # Zone sets up to this size use a precomputed distance matrix, larger ones a BallTree
+    SPATIAL_MATRIX_MAX_ZONES: int = int(os.getenv("SPATIAL_MATRIX_MAX_ZONES", "1000"))
     
     ML_ZONE_ID_MAP: dict = {
         1: "BF_001",
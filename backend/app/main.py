@@ -1,9 +1,12 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 from app.config import settings
-from app.routes import zones, predict, events, health, auth_routes, recommendations, ml_status
+from app.routes import zones, predict, events, health, auth_routes, recommendations, ml_status, heatmap
 from app.middleware.cors import setup_cors
 from app.database import create_indexes, close_db_connection
+from app.services.inference_executor import inference_executor, InferenceRejected, InferenceTimeout
+from app.services.prediction_service import prediction_service
 
 
 @asynccontextmanager
@@ -15,6 +18,8 @@ async def lifespan(app: FastAPI):
     
     yield
     
+    inference_executor.shutdown()
+    prediction_service.shutdown()
     await close_db_connection()
 
 
@@ -27,11 +32,23 @@ app = FastAPI(
 
 setup_cors(app)
 
+
+@app.exception_handler(InferenceRejected)
+async def inference_rejected_handler(request: Request, exc: InferenceRejected):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
+@app.exception_handler(InferenceTimeout)
+async def inference_timeout_handler(request: Request, exc: InferenceTimeout):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+
 app.include_router(health.router, prefix=settings.API_PREFIX, tags=["Health"])
 app.include_router(ml_status.router, prefix=settings.API_PREFIX, tags=["ML Status"])
 app.include_router(auth_routes.router, prefix=settings.API_PREFIX, tags=["Authentication"])
 app.include_router(zones.router, prefix=settings.API_PREFIX, tags=["Zones"])
 app.include_router(predict.router, prefix=settings.API_PREFIX, tags=["Predictions"])
+app.include_router(heatmap.router, prefix=settings.API_PREFIX, tags=["Predictions"])
 app.include_router(events.router, prefix=settings.API_PREFIX, tags=["Events"])
 app.include_router(recommendations.router, prefix=settings.API_PREFIX, tags=["Recommendations"])
 
@@ -1,9 +1,10 @@
 """Prediction result model."""
-from typing import Literal
+from typing import Annotated, List, Literal, Optional
 from pydantic import BaseModel, Field
 
 
 AvailabilityLevel = Literal["High", "Medium", "Low"]
+Hour = Annotated[int, Field(ge=0, le=23)]
 
 
 class PredictionRequest(BaseModel):
@@ -55,3 +56,68 @@ class PredictionResponse(BaseModel):
                 }
             }
         }
+
+
+class BatchPredictionItem(BaseModel):
+    """One (zone, date, hour) slot of a batch prediction."""
+    
+    zone_id: int = Field(..., description="Zone ID for prediction")
+    date: str = Field(..., description="Date in YYYY-MM-DD format")
+    hour: int = Field(..., ge=0, le=23, description="Hour of day (0-23)")
+    day_of_week: Optional[int] = Field(None, ge=0, le=6, description="Day of week (default: from date)")
+
+
+class BatchPredictionRange(BaseModel):
+    """Every zone in zone_ids at every hour in hours on one date."""
+    
+    zone_ids: List[int] = Field(..., min_length=1, description="Zone IDs for prediction")
+    date: str = Field(..., description="Date in YYYY-MM-DD format")
+    hours: List[Hour] = Field(default_factory=lambda: list(range(24)), description="Hours of day (default: all 24)")
+
+
+class BatchPredictionRequest(BaseModel):
+    """Request model for batch parking prediction.
+    
+    Results list the items first, then each range expanded zone by zone
+    with hours in the given order.
+    """
+    
+    items: List[BatchPredictionItem] = Field(default_factory=list)
+    ranges: List[BatchPredictionRange] = Field(default_factory=list)
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [{"zone_id": 1, "date": "2026-02-07", "hour": 14}],
+                "ranges": [{"zone_ids": [1, 2, 3], "date": "2026-02-07", "hours": [8, 9, 10]}]
+            }
+        }
+
+
+class BatchPredictionResponse(BaseModel):
+    """Response model for batch parking prediction."""
+    
+    count: int
+    predictions: List[PredictionResponse]
+
+
+class HeatmapZone(BaseModel):
+    """Zone of a heatmap row."""
+    
+    id: int
+    name: str
+
+
+class HeatmapResponse(BaseModel):
+    """Occupancy of every zone at every hour of one date.
+    
+    Row i of each matrix belongs to zones[i], column j to hours[j].
+    """
+    
+    date: str
+    model_version: str
+    hours: List[int]
+    zones: List[HeatmapZone]
+    occupancy: List[List[float]] = Field(..., description="Predicted occupancy percentage")
+    availability: List[List[AvailabilityLevel]]
+    confidence: List[List[float]]
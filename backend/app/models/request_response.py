@@ -1,5 +1,6 @@
 """Common request/response models."""
-from typing import Optional
+from functools import cached_property
+from typing import Optional, Tuple
 from pydantic import BaseModel
 
 
@@ -26,6 +27,11 @@ class EventResponse(BaseModel):
     event_type: Optional[str] = None
     venue: Optional[str] = None
     expected_attendance: Optional[int] = None
+    
+    @cached_property
+    def hour_interval(self) -> Tuple[int, int]:
+        """(start hour, end hour) parsed from start_time and end_time."""
+        return int(self.start_time.split(":")[0]), int(self.end_time.split(":")[0])
 
 
 class ErrorResponse(BaseModel):
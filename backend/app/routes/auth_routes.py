@@ -4,6 +4,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from datetime import timedelta
 
+from app.config import settings
 from app.models.auth_schemas import UserRegister, UserLogin, Token, UserResponse, TokenData
 from app.services.auth_service import (
     authenticate_user,
@@ -46,6 +47,17 @@ async def get_current_user(
     return user
 
 
+async def get_admin_user(current_user: dict = Depends(get_current_user)) -> dict:
+    """Get current authenticated user, who must be listed in ADMIN_USERNAMES."""
+    admins = {name.strip() for name in settings.ADMIN_USERNAMES.split(",") if name.strip()}
+    if current_user.get("username") not in admins:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    return current_user
+
+
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
 async def register(user_data: UserRegister):
     """Register a new user."""
@@ -55,8 +55,54 @@ def load_events_from_file():
         print(f"Error loading events: {e}")
         return []
 
+class EventStore:
+    """In-memory events indexed by id, (zone_id, date) and date.
+    
+    EventResponse objects are built once when events are loaded and shared
+    by every query; their hour intervals are parsed once on first use.
+    load() builds new indexes and swaps them in with a single assignment,
+    so readers never see a half-built store.
+    """
+    
+    def __init__(self, events: List[dict]):
+        self.load(events)
+    
+    def load(self, events: List[dict]):
+        """Replace the stored events."""
+        all_events = [EventResponse(**event) for event in events]
+        by_id = {}
+        by_zone_date = {}
+        by_date = {}
+        for event in all_events:
+            by_id.setdefault(event.id, event)
+            by_zone_date.setdefault((event.zone_id, event.date), []).append(event)
+            by_date.setdefault(event.date, []).append(event)
+        self._indexes = {
+            "all": all_events,
+            "by_id": by_id,
+            "by_zone_date": by_zone_date,
+            "by_date": by_date,
+        }
+    
+    def all(self) -> List[EventResponse]:
+        """Every event, in load order."""
+        return list(self._indexes["all"])
+    
+    def get(self, event_id: str) -> Optional[EventResponse]:
+        """Event with the given id, or None."""
+        return self._indexes["by_id"].get(event_id)
+    
+    def for_zone(self, zone_id: int, date: str) -> List[EventResponse]:
+        """Events in a zone on a date."""
+        return list(self._indexes["by_zone_date"].get((zone_id, date), ()))
+    
+    def for_date(self, date: str) -> List[EventResponse]:
+        """Events in any zone on a date."""
+        return list(self._indexes["by_date"].get(date, ()))
+
+
 # Load events at startup
-EVENTS_STORAGE = load_events_from_file()
+event_store = EventStore(load_events_from_file())
 
 
 async def get_events_for_zone(
@@ -64,12 +110,7 @@ async def get_events_for_zone(
     date: str
 ) -> List[EventResponse]:
     """Get events for a specific zone on a given date."""
-    events = [
-        EventResponse(**event)
-        for event in EVENTS_STORAGE
-        if event["zone_id"] == zone_id and event["date"] == date
-    ]
-    return events
+    return event_store.for_zone(zone_id, date)
 
 
 @router.get("/events", response_model=List[EventResponse])
@@ -78,29 +119,25 @@ async def get_events(
     date: Optional[str] = None
 ):
     """Get all events, optionally filtered by zone and date."""
-    events = EVENTS_STORAGE
+    if zone_id and date:
+        return event_store.for_zone(zone_id, date)
     
+    events = event_store.for_date(date) if date else event_store.all()
     if zone_id:
-        events = [e for e in events if e["zone_id"] == zone_id]
-    
-    if date:
-        events = [e for e in events if e["date"] == date]
+        events = [e for e in events if e.zone_id == zone_id]
     
-    return [EventResponse(**event) for event in events]
+    return events
 
 
 @router.get("/events/date/{date}")
 async def get_events_by_date(date: str):
     """Get all events for a specific date with zone information."""
-    events = [e for e in EVENTS_STORAGE if e["date"] == date]
+    events = event_store.for_date(date)
     
     # Group by zone
     zones_with_events = {}
     for event in events:
-        zone_id = event["zone_id"]
-        if zone_id not in zones_with_events:
-            zones_with_events[zone_id] = []
-        zones_with_events[zone_id].append(event)
+        zones_with_events.setdefault(event.zone_id, []).append(event)
     
     return {
         "date": date,
@@ -114,7 +151,7 @@ async def get_events_by_date(date: str):
 @router.get("/events/{event_id}")
 async def get_event(event_id: str):
     """Get a specific event by ID."""
-    event = next((e for e in EVENTS_STORAGE if e["id"] == event_id), None)
+    event = event_store.get(event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
-    return EventResponse(**event)
+    return event
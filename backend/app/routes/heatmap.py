@@ -0,0 +1,85 @@
+"""Zone × hour occupancy heatmap route."""
+import time
+from fastapi import APIRouter, HTTPException
+from datetime import datetime
+from app.config import settings
+from app.database import zones_collection
+from app.models.prediction_model import HeatmapResponse
+from app.services.prediction_service import prediction_service
+from app.services.inference_executor import inference_executor
+from app.routes.events import get_events_for_zone
+from app.utils.cache import TTLCache
+from app.utils.event_utils import events_fingerprint
+
+router = APIRouter()
+
+HOURS = list(range(24))
+
+HEATMAP_CACHE = TTLCache(
+    maxsize=settings.HEATMAP_CACHE_SIZE,
+    ttl_seconds=settings.HEATMAP_CACHE_TTL_S
+)
+
+
+@router.get("/heatmap", response_model=HeatmapResponse)
+async def get_heatmap(date: str):
+    """Get predicted occupancy for every zone at every hour of a date.
+
+    All zones × 24 hours are predicted with one batched model call; the
+    result is cached per date, zone list, the zones' events and model
+    generation.
+    """
+    started = time.perf_counter()
+    try:
+        day_of_week = datetime.strptime(date, "%Y-%m-%d").weekday()
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"Invalid date '{date}', expected YYYY-MM-DD")
+
+    zones = await zones_collection.find().to_list(length=100)
+    if not zones:
+        zones = settings.DEFAULT_ZONES
+    zones = [{"id": zone["id"], "name": zone["name"]} for zone in zones]
+
+    events_by_zone_date = {
+        (zone["id"], date): await get_events_for_zone(zone["id"], date)
+        for zone in zones
+    }
+
+    model_version = prediction_service.model_generation()
+    cache_key = (
+        date,
+        tuple(zone["id"] for zone in zones),
+        tuple(events_fingerprint(events) for events in events_by_zone_date.values()),
+        model_version
+    )
+    cached = HEATMAP_CACHE.get(cache_key)
+    if cached is not None:
+        HEATMAP_CACHE.record_latency(True, time.perf_counter() - started)
+        return cached
+
+    slots = [
+        {"zone_id": zone["id"], "date": date, "hour": hour, "day_of_week": day_of_week}
+        for zone in zones
+        for hour in HOURS
+    ]
+
+    # One batched prediction on the inference pool
+    prediction_results = await inference_executor.run(
+        prediction_service.predict_occupancy_batch,
+        slots,
+        events_by_zone_date
+    )
+
+    rows = [prediction_results[i:i + len(HOURS)] for i in range(0, len(prediction_results), len(HOURS))]
+    heatmap = HeatmapResponse(
+        date=date,
+        model_version=model_version,
+        hours=HOURS,
+        zones=zones,
+        occupancy=[[result["occupancy"] for result in row] for row in rows],
+        availability=[[result["availability_level"] for result in row] for row in rows],
+        confidence=[[result["confidence"] for result in row] for row in rows]
+    )
+    HEATMAP_CACHE.put(cache_key, heatmap)
+    HEATMAP_CACHE.record_latency(False, time.perf_counter() - started)
+    return heatmap
@@ -1,9 +1,14 @@
 """ML model status and validation routes."""
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import Dict, List
+from typing import Dict, List, Optional
 import os
+from app.routes.auth_routes import get_admin_user
 from app.services.prediction_service import prediction_service
+from app.services.inference_executor import inference_executor
+from app.routes.heatmap import HEATMAP_CACHE
+from app.routes.predict import PREDICTION_CACHE
 from app.config import settings
 
 router = APIRouter()
@@ -22,6 +27,20 @@ class MLStatusResponse(BaseModel):
     total_zones: int
     status_message: str
     recommendations: List[str]
+    memory_report_mb: Dict[str, float] = {}
+    feature_cache: Dict = {}
+    active_model_version: Optional[str] = None
+    model_info: Dict = {}
+    available_model_versions: List[str] = []
+    inference_executor: Dict = {}
+    inference_pool: Dict = {}
+    response_caches: Dict[str, Dict] = {}
+    worker_pid: int = 0
+
+
+class MLReloadRequest(BaseModel):
+    """Request model for reloading the ML model."""
+    version: Optional[str] = None
 
 
 @router.get("/ml-status", response_model=MLStatusResponse)
@@ -32,7 +51,8 @@ async def get_ml_status():
     This endpoint validates that the ML model is properly loaded and configured
     for use in predictions and recommendations.
     """
-    ml_model_path = settings.ML_MODEL_PATH
+    model_info = prediction_service.model_info()
+    ml_model_path = model_info.get("model_file") or settings.ML_MODEL_PATH
     ml_data_dir = settings.ML_DATA_DIR
     
     # Check if files exist
@@ -89,10 +109,56 @@ async def get_ml_status():
         zone_mappings=settings.ML_ZONE_ID_MAP,
         total_zones=len(settings.ML_ZONE_ID_MAP),
         status_message=status_message,
-        recommendations=recommendations
+        recommendations=recommendations,
+        memory_report_mb=prediction_service.memory_report(),
+        feature_cache=prediction_service.feature_cache_stats(),
+        active_model_version=model_info.get("version"),
+        model_info=model_info,
+        available_model_versions=prediction_service.available_model_versions(),
+        inference_executor=inference_executor.stats(),
+        inference_pool=prediction_service.inference_pool_info(),
+        response_caches={"predict": PREDICTION_CACHE.stats(), "heatmap": HEATMAP_CACHE.stats()},
+        worker_pid=os.getpid()
     )
 
 
+@router.post("/ml-reload")
+async def reload_ml_model(
+    request: Optional[MLReloadRequest] = None,
+    admin: dict = Depends(get_admin_user)
+):
+    """
+    Load a model version and fresh data, then swap it in without a restart.
+    
+    The new model is loaded and warmed up in a worker thread while requests
+    keep being served by the current model. Omit the version to load the
+    registry's active version (or the configured model file). Only this
+    worker reloads immediately; other workers follow a changed ACTIVE
+    version within ML_ACTIVE_CHECK_INTERVAL_S. Requires an admin user.
+    """
+    version = request.version if request else None
+    try:
+        info = await run_in_threadpool(prediction_service.reload_model, version)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model reload failed: {e}")
+    
+    # Keys carry the model generation, so old entries can no longer hit; free them now
+    PREDICTION_CACHE.clear()
+    HEATMAP_CACHE.clear()
+    
+    return {
+        "success": True,
+        "active_model_version": info["version"],
+        "model_info": info,
+        "worker_pid": os.getpid(),
+        "message": "✅ ML model reloaded"
+    }
+
+
 @router.get("/ml-test")
 async def test_ml_prediction():
     """
@@ -102,7 +168,8 @@ async def test_ml_prediction():
     """
     try:
         # Test prediction for Zone 1 at 6 PM on a weekday
-        result = prediction_service.predict_occupancy(
+        result = await inference_executor.run(
+            prediction_service.predict_occupancy,
             zone_id=1,
             date_str="2024-12-25",
             hour=18,
@@ -1,36 +1,37 @@
 """Prediction routes for MongoDB."""
+import os
+import sys
+import time
 from fastapi import APIRouter, HTTPException
 from datetime import datetime
+from typing import Dict, List
+from app.config import settings
 from app.database import zones_collection
-from app.models.prediction_model import PredictionRequest, PredictionResponse
+from app.models.prediction_model import (
+    PredictionRequest,
+    PredictionResponse,
+    BatchPredictionRequest,
+    BatchPredictionResponse,
+)
 from app.services.prediction_service import prediction_service
+from app.services.inference_executor import inference_executor
 from app.routes.events import get_events_for_zone
+from app.utils.cache import TTLCache
+from app.utils.event_utils import events_fingerprint
 
 router = APIRouter()
 
+PREDICTION_CACHE = TTLCache(
+    maxsize=settings.PREDICT_CACHE_SIZE,
+    ttl_seconds=settings.PREDICT_CACHE_TTL_S
+)
 
-@router.post("/predict", response_model=PredictionResponse)
-async def predict_availability(request: PredictionRequest):
-    """Predict parking availability for a zone at a specific time."""
-    
-    # Get zone information
-    zone = await zones_collection.find_one({"id": request.zone_id})
-    if not zone:
-        from app.config import settings
-        default_zone = next((z for z in settings.DEFAULT_ZONES if z["id"] == request.zone_id), None)
-        if not default_zone:
-            raise HTTPException(status_code=404, detail="Zone not found")
-        zone_name = default_zone["name"]
-    else:
-        zone_name = zone["name"]
-    
-    # Get zone capacity from ML config
-    from app.config import settings
-    ml_zone_id = settings.ML_ZONE_ID_MAP.get(request.zone_id)
+
+def _zone_capacity(zone_id: int) -> int:
+    """Total parking spaces of a zone, from the ML zone metadata."""
+    ml_zone_id = settings.ML_ZONE_ID_MAP.get(zone_id)
     
     # Import ML config to get capacity
-    import sys
-    import os
     ml_src = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "ml", "src")
     if ml_src not in sys.path:
         sys.path.insert(0, ml_src)
@@ -38,22 +39,20 @@ async def predict_availability(request: PredictionRequest):
     try:
         from config import ZONE_METADATA
         zone_metadata = ZONE_METADATA.get(ml_zone_id, {})
-        total_spaces = zone_metadata.get('capacity', 20)
+        return zone_metadata.get('capacity', 20)
     except:
-        total_spaces = 20  # Default fallback
-    
-    # Get events for the zone
-    events = await get_events_for_zone(request.zone_id, request.date)
-    
-    # Make prediction
-    prediction_result = prediction_service.predict_occupancy(
-        zone_id=request.zone_id,
-        date_str=request.date,
-        hour=request.hour,
-        day_of_week=request.day_of_week,
-        events=events
-    )
-    
+        return 20  # Default fallback
+
+
+def _build_response(
+    zone_id: int,
+    zone_name: str,
+    total_spaces: int,
+    date: str,
+    hour: int,
+    prediction_result: Dict
+) -> PredictionResponse:
+    """Build the API response for one prediction."""
     # Calculate available spaces
     occupancy_rate = prediction_result["occupancy"] / 100.0
     available_spaces = int((1 - occupancy_rate) * total_spaces)
@@ -74,15 +73,17 @@ async def predict_availability(request: PredictionRequest):
         "traffic_level": features["traffic_level"],
         "events_nearby": features["events_count"]
     }
+    if prediction_result.get("occupancy_interval"):
+        factors["occupancy_interval"] = prediction_result["occupancy_interval"]
     
     # Create response
     timestamp = datetime.strptime(
-        f"{request.date} {request.hour:02d}:00:00",
+        f"{date} {hour:02d}:00:00",
         "%Y-%m-%d %H:%M:%S"
     ).isoformat()
     
     return PredictionResponse(
-        zone_id=request.zone_id,
+        zone_id=zone_id,
         zone_name=zone_name,
         availability_level=prediction_result["availability_level"],
         confidence_score=prediction_result["confidence"],
@@ -92,3 +93,137 @@ async def predict_availability(request: PredictionRequest):
         timestamp=timestamp,
         factors=factors
     )
+
+
+@router.post("/predict", response_model=PredictionResponse)
+async def predict_availability(request: PredictionRequest):
+    """Predict parking availability for a zone at a specific time.
+    
+    Responses are cached by request fields, the zone's events that date and
+    the model generation, so an event or model change never serves stale
+    results.
+    """
+    started = time.perf_counter()
+    
+    # Get events for the zone
+    events = await get_events_for_zone(request.zone_id, request.date)
+    
+    cache_key = (
+        request.zone_id,
+        request.date,
+        request.hour,
+        request.day_of_week,
+        events_fingerprint(events),
+        prediction_service.model_generation()
+    )
+    cached = PREDICTION_CACHE.get(cache_key)
+    if cached is not None:
+        PREDICTION_CACHE.record_latency(True, time.perf_counter() - started)
+        return cached
+    
+    # Get zone information
+    zone = await zones_collection.find_one({"id": request.zone_id})
+    if not zone:
+        default_zone = next((z for z in settings.DEFAULT_ZONES if z["id"] == request.zone_id), None)
+        if not default_zone:
+            raise HTTPException(status_code=404, detail="Zone not found")
+        zone_name = default_zone["name"]
+    else:
+        zone_name = zone["name"]
+    
+    # Get zone capacity from ML config
+    total_spaces = _zone_capacity(request.zone_id)
+    
+    # Make prediction on the inference pool so the event loop stays free
+    prediction_result = await inference_executor.run(
+        prediction_service.predict_occupancy,
+        zone_id=request.zone_id,
+        date_str=request.date,
+        hour=request.hour,
+        day_of_week=request.day_of_week,
+        events=events
+    )
+    
+    response = _build_response(
+        request.zone_id, zone_name, total_spaces, request.date, request.hour, prediction_result
+    )
+    PREDICTION_CACHE.put(cache_key, response)
+    PREDICTION_CACHE.record_latency(False, time.perf_counter() - started)
+    return response
+
+
+@router.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_availability_batch(request: BatchPredictionRequest):
+    """Predict parking availability for many zone/hour slots in one call.
+    
+    Zones and events are looked up once per distinct zone and (zone, date),
+    and all slots share a single model call.
+    """
+    
+    # Flatten items and ranges into slots, in response order
+    slots: List[Dict] = [
+        {"zone_id": item.zone_id, "date": item.date, "hour": item.hour, "day_of_week": item.day_of_week}
+        for item in request.items
+    ]
+    for zone_range in request.ranges:
+        slots.extend(
+            {"zone_id": zone_id, "date": zone_range.date, "hour": hour, "day_of_week": None}
+            for zone_id in zone_range.zone_ids
+            for hour in zone_range.hours
+        )
+    
+    if not slots:
+        raise HTTPException(status_code=422, detail="Batch contains no items")
+    if len(slots) > settings.PREDICT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Batch has {len(slots)} items, the limit is {settings.PREDICT_BATCH_MAX_ITEMS}"
+        )
+    
+    for slot in slots:
+        try:
+            date_obj = datetime.strptime(slot["date"], "%Y-%m-%d")
+        except ValueError:
+            raise HTTPException(status_code=422, detail=f"Invalid date '{slot['date']}', expected YYYY-MM-DD")
+        if slot["day_of_week"] is None:
+            slot["day_of_week"] = date_obj.weekday()
+    
+    # Get zone information once for all requested zones
+    zone_ids = sorted({slot["zone_id"] for slot in slots})
+    zone_names = {
+        zone["id"]: zone["name"]
+        async for zone in zones_collection.find({"id": {"$in": zone_ids}})
+    }
+    for default_zone in settings.DEFAULT_ZONES:
+        zone_names.setdefault(default_zone["id"], default_zone["name"])
+    
+    missing = [zone_id for zone_id in zone_ids if zone_id not in zone_names]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Zones not found: {missing}")
+    
+    capacities = {zone_id: _zone_capacity(zone_id) for zone_id in zone_ids}
+    
+    # Get events once per (zone, date)
+    events_by_zone_date = {}
+    for key in {(slot["zone_id"], slot["date"]) for slot in slots}:
+        events_by_zone_date[key] = await get_events_for_zone(*key)
+    
+    # One batched prediction on the inference pool
+    prediction_results = await inference_executor.run(
+        prediction_service.predict_occupancy_batch,
+        slots,
+        events_by_zone_date
+    )
+    
+    predictions = [
+        _build_response(
+            slot["zone_id"],
+            zone_names[slot["zone_id"]],
+            capacities[slot["zone_id"]],
+            slot["date"],
+            slot["hour"],
+            prediction_result
+        )
+        for slot, prediction_result in zip(slots, prediction_results)
+    ]
+    return BatchPredictionResponse(count=len(predictions), predictions=predictions)
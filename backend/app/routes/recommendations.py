@@ -3,7 +3,8 @@ from fastapi import APIRouter, Query
 from typing import List
 from pydantic import BaseModel
 from app.services.recommendation_service import recommendation_service
-from app.routes.events import get_events_for_zone
+from app.services.inference_executor import inference_executor
+from app.routes.events import event_store
 
 router = APIRouter()
 
@@ -43,11 +44,12 @@ async def get_alternative_zones(
     
     Only returns recommendations when current zone has Low or Medium availability.
     """
-    # Get events that might affect zones
-    events = await get_events_for_zone(zone_id, date)
+    # Events in every zone on that date, so each candidate is scored with its own
+    events = event_store.for_date(date)
     
-    # Get ML-powered recommendations
-    recommendations = recommendation_service.get_alternative_zones(
+    # Get ML-powered recommendations (scored on the inference pool)
+    recommendations = await inference_executor.run(
+        recommendation_service.get_alternative_zones,
         current_zone_id=zone_id,
         date_str=date,
         hour=hour,
@@ -20,7 +20,7 @@ def build_features(
         date_str: Date in YYYY-MM-DD format
         hour: Hour of day
         day_of_week: Day of week
-        events: List of events
+        events: Events in the zone on date_str
     
     Returns:
         Dictionary of features
@@ -35,7 +35,7 @@ def build_features(
     # Event features
     event_info = {"events_nearby": 0, "event_names": [], "event_impact": 0.0}
     if events:
-        event_info = check_events_nearby(zone_id, date_str, hour, events)
+        event_info = check_events_nearby(hour, events)
     
     # Zone-specific features
     zone_features = {
@@ -0,0 +1,134 @@
+"""Bounded executor that keeps CPU-bound inference off the asyncio event loop."""
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict
+
+from app.config import settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class InferenceRejected(Exception):
+    """Raised when the inference queue is full."""
+
+
+class InferenceTimeout(Exception):
+    """Raised when an inference call does not finish within the timeout."""
+
+
+class InferenceExecutor:
+    """Run blocking prediction calls on a fixed-size thread pool.
+
+    At most max_workers calls run at once and at most max_queue more wait for
+    a worker; further calls are rejected immediately instead of piling up.
+    Callers waiting longer than timeout_s get InferenceTimeout (the work
+    itself still finishes in the background and keeps its slot until then).
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, timeout_s: float):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout_s = timeout_s
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+        self._max_queue_depth = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._total_wait_ms = 0.0
+        self._total_run_ms = 0.0
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run fn(*args, **kwargs) on the pool and await its result.
+
+        Raises:
+            InferenceRejected: If max_workers + max_queue calls are already in flight
+            InferenceTimeout: If the call does not finish within timeout_s
+        """
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise InferenceRejected("Inference queue is full, try again shortly")
+            self._in_flight += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._in_flight - self._running)
+
+        try:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(
+                self._executor, partial(self._call, fn, time.perf_counter(), args, kwargs)
+            )
+        except BaseException:
+            # Never submitted (e.g. after shutdown), so _call will not release the slot
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=self.timeout_s)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._timeouts += 1
+            logger.warning(f"⚠️  Inference call {getattr(fn, '__name__', fn)} timed out after {self.timeout_s}s")
+            raise InferenceTimeout(f"Prediction did not finish within {self.timeout_s}s")
+
+    def _call(self, fn: Callable, submitted: float, args: tuple, kwargs: dict):
+        """Worker-thread side: record queue wait and run time around fn."""
+        started = time.perf_counter()
+        with self._lock:
+            self._running += 1
+            self._total_wait_ms += (started - submitted) * 1000
+
+        failed = False
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._in_flight -= 1
+                self._total_run_ms += (time.perf_counter() - started) * 1000
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+
+    def stats(self) -> Dict:
+        """Queue depth, throughput and latency counters."""
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "timeout_s": self.timeout_s,
+                "running": self._running,
+                "queued": self._in_flight - self._running,
+                "max_queue_depth": self._max_queue_depth,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+                "avg_wait_ms": round(self._total_wait_ms / finished, 3) if finished else 0.0,
+                "avg_run_ms": round(self._total_run_ms / finished, 3) if finished else 0.0,
+            }
+
+    def shutdown(self):
+        """Stop accepting work; running calls finish in the background."""
+        self._executor.shutdown(wait=False)
+
+
+# Singleton instance
+inference_executor = InferenceExecutor(
+    max_workers=settings.INFERENCE_MAX_WORKERS,
+    max_queue=settings.INFERENCE_MAX_QUEUE,
+    timeout_s=settings.INFERENCE_TIMEOUT_S,
+)
@@ -2,9 +2,11 @@
 import os
 import sys
 import pickle
+import time
 import logging
+import threading
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 from app.config import settings
 from app.services.feature_builder import build_features, get_feature_vector
@@ -39,8 +41,21 @@ class PredictionService:
         self.model = None
         self.ml_available = False
         self._ml_predict_fn = None
+        self._ml_memory_report_fn = None
+        self._ml_cache_stats_fn = None
+        self._ml_reload_fn = None
+        self._ml_runtime_info_fn = None
+        self._ml_batch_fn = None
+        self._ml_load_fn = None
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._pool_users = {}
+        self._retired_pools = set()
         self._ml_model_path = None
         self._ml_data_dir = None
+        self._reload_lock = threading.Lock()
+        self._next_active_check = 0.0
+        self._failed_active_version = None
         self._init_ml_or_legacy()
 
     def _init_ml_or_legacy(self):
@@ -52,7 +67,25 @@ class PredictionService:
         model_path = settings.ML_MODEL_PATH
         data_dir = settings.ML_DATA_DIR
         
+        ml_src = _ml_src_path()
+        if ml_src not in sys.path:
+            sys.path.insert(0, ml_src)
+        
+        # An active registry version replaces the configured model file
+        try:
+            from registry import get_active_version, version_model_path
+            active_version = get_active_version(settings.ML_REGISTRY_DIR)
+            if active_version:
+                model_path = version_model_path(active_version, settings.ML_REGISTRY_DIR)
+        except Exception as e:
+            logger.error(f"❌ Failed to read the ML model registry: {e}")
+            logger.error("   Falling back to rule-based predictions")
+            import traceback
+            traceback.print_exc()
+            return
+        
         logger.info(f"Attempting to load ML model...")
+        logger.info(f"  Model version: {active_version or 'unversioned'}")
         logger.info(f"  Model path: {model_path}")
         logger.info(f"  Data dir: {data_dir}")
         
@@ -68,21 +101,35 @@ class PredictionService:
         model_size_mb = os.path.getsize(model_path) / (1024 * 1024)
         logger.info(f"  Model size: {model_size_mb:.1f} MB")
         
-        ml_src = _ml_src_path()
-        if ml_src not in sys.path:
-            sys.path.insert(0, ml_src)
-        
         try:
             from predict import predict_occupancy_at_time
+            from predict import predict_occupancy_batch
             from predict import load_model
+            from predict import reload_model
+            from predict import runtime_info
+            from predict import memory_report
+            from predict import feature_cache_stats
             
             logger.info("  Loading ML model...")
-            load_model(model_path=model_path, data_dir=data_dir)
+            load_model(
+                model_path=model_path,
+                data_dir=data_dir,
+                history_weeks=settings.ML_HISTORY_WEEKS or None,
+                version=active_version,
+                registry_dir=settings.ML_REGISTRY_DIR,
+            )
             
             self._ml_predict_fn = predict_occupancy_at_time
+            self._ml_memory_report_fn = memory_report
+            self._ml_cache_stats_fn = feature_cache_stats
+            self._ml_reload_fn = reload_model
+            self._ml_runtime_info_fn = runtime_info
+            self._ml_batch_fn = predict_occupancy_batch
+            self._ml_load_fn = load_model
             self._ml_model_path = model_path
             self._ml_data_dir = data_dir
             self.ml_available = True
+            self._start_pool()
             
             logger.info("✅ ML model loaded successfully!")
             logger.info(f"   Zone mappings: {len(settings.ML_ZONE_ID_MAP)} zones configured")
@@ -105,6 +152,7 @@ class PredictionService:
         Uses ML model from ml/ folder when available, else rule-based.
         """
         features = build_features(zone_id, date_str, hour, day_of_week, events)
+        self._follow_active_version()
 
         if self.ml_available and self._ml_predict_fn:
             ml_zone_id = settings.ML_ZONE_ID_MAP.get(zone_id)
@@ -114,25 +162,20 @@ class PredictionService:
                         f"{date_str} {hour:02d}:00:00",
                         "%Y-%m-%d %H:%M:%S"
                     )
+                    # Precomputed slots only hold without events
                     result = self._ml_predict_fn(
                         ml_zone_id,
                         target_dt,
                         model_path=self._ml_model_path,
                         data_dir=self._ml_data_dir,
+                        allow_grid=not events,
                     )
-                    occupancy = result.get("occupancy_percent", result.get("occupancy_rate", 0.5) * 100)
-                    confidence = result.get("confidence", 85) / 100.0  # Convert to 0-1 range
-                    availability_level = self._occupancy_to_availability(occupancy)
+                    prediction = self._from_ml_result(result, features)
                     
-                    logger.debug(f"✅ ML prediction for zone {zone_id} ({ml_zone_id}): {occupancy:.1f}% occupancy")
+                    logger.debug(f"✅ ML prediction for zone {zone_id} ({ml_zone_id}): {prediction['occupancy']:.1f}% occupancy "
+                                 f"({prediction['prediction_source']})")
                     
-                    return {
-                        "occupancy": round(occupancy, 1),
-                        "availability_level": availability_level,
-                        "confidence": confidence,
-                        "features": features,
-                        "ml_used": True  # Flag to track ML usage
-                    }
+                    return prediction
                 except Exception as e:
                     logger.error(f"❌ ML prediction error for zone {zone_id}: {e}")
                     logger.error("   Using fallback rule-based prediction")
@@ -142,6 +185,89 @@ class PredictionService:
         # Fallback: rule-based or legacy pickle model
         logger.warning(f"⚠️  Using FALLBACK prediction for zone {zone_id} (ML not available)")
         
+        return self._fallback_prediction(features)
+    
+    def predict_occupancy_batch(
+        self,
+        items: List[Dict],
+        events_by_zone_date: Optional[Dict] = None,
+        include_features: bool = True
+    ) -> List[Dict]:
+        """Predict parking occupancy for many (zone, date, hour) items at once.
+        
+        All ML-mapped items go through a single batched model call; the rest
+        use the rule-based fallback.
+        
+        Args:
+            items: Dicts with zone_id, date, hour and day_of_week
+            events_by_zone_date: Events keyed by (zone_id, date)
+            include_features: Build the "features" of ML predictions; when False
+                they are None and features are only built for fallback items
+        
+        Returns:
+            Prediction dicts (as from predict_occupancy), in item order
+        """
+        events_by_zone_date = events_by_zone_date or {}
+        item_events = [events_by_zone_date.get((item["zone_id"], item["date"])) for item in items]
+        
+        def item_features(i):
+            item = items[i]
+            return build_features(item["zone_id"], item["date"], item["hour"], item["day_of_week"], item_events[i])
+        
+        features = [item_features(i) if include_features else None for i in range(len(items))]
+        predictions = [None] * len(items)
+        self._follow_active_version()
+
+        if self.ml_available and self._ml_batch_fn:
+            rows = [i for i, item in enumerate(items) if settings.ML_ZONE_ID_MAP.get(item["zone_id"])]
+            if rows:
+                pool = self._lease_pool()
+                try:
+                    results = self._ml_batch_fn(
+                        [settings.ML_ZONE_ID_MAP[items[i]["zone_id"]] for i in rows],
+                        [
+                            datetime.strptime(f"{items[i]['date']} {items[i]['hour']:02d}:00:00", "%Y-%m-%d %H:%M:%S")
+                            for i in rows
+                        ],
+                        model_path=self._ml_model_path,
+                        data_dir=self._ml_data_dir,
+                        # Precomputed slots only hold without events
+                        allow_grid=[not item_events[i] for i in rows],
+                        pool=pool,
+                    )
+                    for i, result in zip(rows, results):
+                        predictions[i] = self._from_ml_result(result, features[i])
+                except Exception as e:
+                    logger.error(f"❌ ML batch prediction error for {len(rows)} items: {e}")
+                    logger.error("   Using fallback rule-based prediction")
+                finally:
+                    self._return_pool(pool)
+
+        fallback = [i for i, prediction in enumerate(predictions) if prediction is None]
+        if fallback:
+            logger.warning(f"⚠️  Using FALLBACK prediction for {len(fallback)} of {len(items)} batch items")
+            for i in fallback:
+                predictions[i] = self._fallback_prediction(features[i] or item_features(i))
+        return predictions
+
+    def _from_ml_result(self, result: Dict, features: Dict) -> Dict:
+        """Convert an ML predict result into the service's prediction dict."""
+        occupancy = result.get("occupancy_percent", result.get("occupancy_rate", 0.5) * 100)
+        confidence = result.get("confidence", 85) / 100.0  # Convert to 0-1 range
+        interval = result.get("occupancy_interval")
+        occupancy_upper = interval[1] * 100 if interval else None
+        return {
+            "occupancy": round(occupancy, 1),
+            "availability_level": self._occupancy_to_availability(occupancy, occupancy_upper),
+            "confidence": confidence,
+            "occupancy_interval": [round(v * 100, 1) for v in interval] if interval else None,
+            "features": features,
+            "prediction_source": result.get("source", "model"),
+            "ml_used": True  # Flag to track ML usage
+        }
+
+    def _fallback_prediction(self, features: Dict) -> Dict:
+        """Rule-based (or legacy pickle model) prediction from built features."""
         feature_vector = get_feature_vector(features)
         if self.model:
             try:
@@ -161,6 +287,189 @@ class PredictionService:
             "ml_used": False  # Flag to track ML usage
         }
     
+    def _start_pool(self):
+        """Start (or restart after a reload) the inference process pool, if configured.
+        
+        The previous pool is closed once no batch is using it any more.
+        """
+        if settings.INFERENCE_PROCESSES <= 0:
+            return
+        from pool import InferencePool
+        
+        try:
+            new_pool = InferencePool(self._ml_load_fn(), settings.INFERENCE_PROCESSES)
+            logger.info(f"✅ Inference pool started with {settings.INFERENCE_PROCESSES} worker processes")
+        except Exception as e:
+            new_pool = None
+            logger.error(f"❌ Failed to start inference pool, scoring in-process: {e}")
+        
+        with self._pool_lock:
+            old_pool, self._pool = self._pool, new_pool
+            if old_pool is not None and self._pool_users.get(old_pool):
+                self._retired_pools.add(old_pool)
+                old_pool = None
+        if old_pool is not None:
+            old_pool.close()
+
+    def _lease_pool(self):
+        """Current pool (or None), kept open until handed back with _return_pool."""
+        with self._pool_lock:
+            pool = self._pool
+            if pool is not None:
+                self._pool_users[pool] = self._pool_users.get(pool, 0) + 1
+            return pool
+
+    def _return_pool(self, pool):
+        """Release a pool from _lease_pool, closing it if it was retired and is now unused."""
+        if pool is None:
+            return
+        with self._pool_lock:
+            self._pool_users[pool] -= 1
+            if self._pool_users[pool]:
+                return
+            del self._pool_users[pool]
+            if pool not in self._retired_pools:
+                return
+            self._retired_pools.discard(pool)
+        pool.close()
+
+    def inference_pool_info(self) -> Dict:
+        """Worker count and shared array directory of the process pool, empty if disabled."""
+        pool = self._pool
+        if pool is None:
+            return {}
+        return {
+            "workers": pool.workers,
+            "shared_dir": pool.shared_dir,
+            "data_version": pool.data_version,
+        }
+
+    def shutdown(self):
+        """Stop the inference process pools."""
+        with self._pool_lock:
+            pools = self._retired_pools | ({self._pool} if self._pool is not None else set())
+            self._pool = None
+            self._retired_pools = set()
+        for pool in pools:
+            pool.close()
+
+    def memory_report(self) -> Dict[str, float]:
+        """Memory (MB) held by the loaded ML model and data, empty if ML is unavailable."""
+        if not self._ml_memory_report_fn:
+            return {}
+        try:
+            return self._ml_memory_report_fn()
+        except Exception as e:
+            logger.error(f"❌ Failed to build ML memory report: {e}")
+            return {}
+    
+    def feature_cache_stats(self) -> Dict:
+        """Counters of the ML feature cache, empty if ML is unavailable."""
+        if not self._ml_cache_stats_fn:
+            return {}
+        return self._ml_cache_stats_fn()
+
+    def model_info(self) -> Dict:
+        """Version and load details of the serving ML model, empty if ML is unavailable."""
+        if not self._ml_runtime_info_fn:
+            return {}
+        return self._ml_runtime_info_fn()
+
+    def model_generation(self) -> str:
+        """Identifier of the serving model that changes on every reload, for cache keys."""
+        info = self.model_info()
+        if not info:
+            return "rule-based"
+        return f"{info['version'] or 'unversioned'}@{info['loaded_at']}"
+
+    def available_model_versions(self) -> List[str]:
+        """Versions in the model registry, oldest first."""
+        if not self.ml_available:
+            return []
+        from registry import list_versions
+        return list_versions(settings.ML_REGISTRY_DIR)
+
+    def reload_model(self, version: Optional[str] = None) -> Dict:
+        """Load a model version and fresh data, then swap it in.
+
+        Loading and warm-up happen on the calling thread while predictions keep
+        using the current model; the swap itself is a single reference update.
+        An explicitly requested version also becomes the registry's active one.
+
+        Args:
+            version: Registry version to load (default: the registry's active
+                version, else the configured ML_MODEL_PATH)
+
+        Returns:
+            Version and load details of the new model
+
+        Raises:
+            RuntimeError: If ML is unavailable or another reload is running
+            ValueError: If the version is not in the registry
+        """
+        if not self._ml_reload_fn:
+            raise RuntimeError("ML model is not loaded")
+        if not self._reload_lock.acquire(blocking=False):
+            raise RuntimeError("A model reload is already in progress")
+
+        try:
+            from registry import get_active_version, set_active_version
+            use_registry = version or get_active_version(settings.ML_REGISTRY_DIR)
+            logger.info(f"🔄 Reloading ML model (version: {version or 'active'})...")
+            info = self._ml_reload_fn(
+                model_path=None if use_registry else settings.ML_MODEL_PATH,
+                data_dir=self._ml_data_dir,
+                history_weeks=settings.ML_HISTORY_WEEKS or None,
+                version=version,
+                registry_dir=settings.ML_REGISTRY_DIR,
+            )
+            self._ml_model_path = info["model_file"]
+            self._start_pool()
+            if version:
+                # Keep the choice across restarts and for other workers' reloads
+                set_active_version(version, settings.ML_REGISTRY_DIR)
+            logger.info(f"✅ ML model {info['version'] or 'unversioned'} active "
+                        f"(loaded in {info['load_seconds']:.1f}s)")
+            return info
+        finally:
+            self._reload_lock.release()
+
+    def _follow_active_version(self):
+        """Reload in the background when another worker changed the registry's ACTIVE version.
+        
+        POST /ml-reload only swaps the worker that receives it; every other
+        worker notices the new ACTIVE pointer here, at most once per
+        ML_ACTIVE_CHECK_INTERVAL_S, and keeps serving its current model until
+        the reload finishes.
+        """
+        if not self._ml_reload_fn or settings.ML_ACTIVE_CHECK_INTERVAL_S <= 0:
+            return
+        now = time.monotonic()
+        if now < self._next_active_check:
+            return
+        self._next_active_check = now + settings.ML_ACTIVE_CHECK_INTERVAL_S
+        
+        try:
+            from registry import get_active_version
+            active = get_active_version(settings.ML_REGISTRY_DIR)
+        except Exception as e:
+            logger.error(f"❌ Failed to read the ML model registry: {e}")
+            return
+        if (not active or active == self.model_info().get("version")
+                or active == self._failed_active_version or self._reload_lock.locked()):
+            return
+        threading.Thread(target=self._reload_active_version, args=(active,), daemon=True).start()
+
+    def _reload_active_version(self, active: str):
+        """Background thread: load the registry's ACTIVE version."""
+        try:
+            self.reload_model()
+        except RuntimeError:
+            pass  # Another reload is already running
+        except Exception as e:
+            self._failed_active_version = active
+            logger.error(f"❌ Failed to follow ACTIVE model version {active}: {e}")
+
     def _rule_based_prediction(self, features: Dict) -> float:
         """Rule-based prediction when ML model is not available.
         
@@ -206,15 +515,25 @@ class PredictionService:
         # Ensure within bounds
         return max(0.0, min(100.0, base_occupancy))
     
-    def _occupancy_to_availability(self, occupancy: float) -> AvailabilityLevel:
+    def _occupancy_to_availability(
+        self,
+        occupancy: float,
+        occupancy_upper: Optional[float] = None
+    ) -> AvailabilityLevel:
         """Convert occupancy percentage to availability level.
         
+        When the model reports a prediction interval, the level is taken from
+        its upper bound so uncertain predictions don't promise free spaces.
+        
         Args:
             occupancy: Occupancy percentage (0-100)
+            occupancy_upper: Upper bound of the prediction interval (0-100)
         
         Returns:
             Availability level
         """
+        if occupancy_upper is not None:
+            occupancy = max(occupancy, occupancy_upper)
         if occupancy < 50:
             return "High"
         elif occupancy < 80:
@@ -1,35 +1,16 @@
 """Recommendation service for alternative parking zones."""
-import math
 import logging
+import numpy as np
 from typing import List, Dict, Optional
+from app.config import settings
 from app.services.prediction_service import prediction_service
+from app.services.spatial_index import ZoneSpatialIndex
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def calculate_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
-    """
-    Calculate distance between two coordinates using Haversine formula.
-    Returns distance in kilometers.
-    """
-    R = 6371  # Earth's radius in kilometers
-    
-    lat1_rad = math.radians(lat1)
-    lat2_rad = math.radians(lat2)
-    delta_lat = math.radians(lat2 - lat1)
-    delta_lng = math.radians(lng2 - lng1)
-    
-    a = (math.sin(delta_lat / 2) ** 2 +
-         math.cos(lat1_rad) * math.cos(lat2_rad) *
-         math.sin(delta_lng / 2) ** 2)
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    
-    distance = R * c
-    return round(distance, 2)
-
-
 def get_availability_score(availability_level: str) -> int:
     """Convert availability level to numeric score for comparison."""
     scores = {
@@ -40,39 +21,37 @@ def get_availability_score(availability_level: str) -> int:
     return scores.get(availability_level, 0)
 
 
-def generate_recommendation_reason(
-    alternative_zone: Dict,
-    current_zone: Dict,
-    distance: float,
-    availability_improvement: int
-) -> str:
-    """Generate human-readable reason for recommendation."""
-    reasons = []
+def generate_recommendation_reasons(
+    distances: np.ndarray,
+    availability_improvements: np.ndarray
+) -> List[str]:
+    """Generate human-readable reasons for a set of recommendations.
+    
+    Args:
+        distances: Distance of each alternative in kilometers
+        availability_improvements: Availability score gain of each alternative
     
+    Returns:
+        One reason per alternative
+    """
     # Distance-based reason
-    if distance < 0.5:
-        reasons.append("Very close by")
-    elif distance < 1.0:
-        reasons.append("Short walk away")
-    elif distance < 2.0:
-        reasons.append("Nearby area")
+    distance_reasons = np.select(
+        [distances < 0.5, distances < 1.0, distances < 2.0],
+        ["Very close by", "Short walk away", "Nearby area"],
+        default=""
+    )
     
     # Availability improvement
-    if availability_improvement == 2:
-        reasons.append("much better availability")
-    elif availability_improvement == 1:
-        reasons.append("better availability")
+    improvement_reasons = np.select(
+        [availability_improvements == 2, availability_improvements == 1],
+        ["much better availability", "better availability"],
+        default=""
+    )
     
-    # Zone type similarity
-    alt_features = alternative_zone.get("features", {})
-    curr_features = current_zone.get("features", {})
-    
-    if (alt_features.get("is_business_district") and curr_features.get("is_business_district")):
-        reasons.append("similar business area")
-    elif (alt_features.get("is_shopping_area") and curr_features.get("is_shopping_area")):
-        reasons.append("similar shopping area")
-    
-    return ", ".join(reasons) if reasons else "alternative option"
+    return [
+        ", ".join(part for part in parts if part) or "alternative option"
+        for parts in zip(distance_reasons.tolist(), improvement_reasons.tolist())
+    ]
 
 
 class RecommendationService:
@@ -92,6 +71,13 @@ class RecommendationService:
         10: {"lat": 47.6505, "lng": -122.3493, "name": "Fremont - Fremont Ave"}
     }
     
+    def __init__(self):
+        """Index the static zone coordinates once for radius queries."""
+        self.spatial_index = ZoneSpatialIndex(
+            self.ZONE_COORDINATES,
+            matrix_max_zones=settings.SPATIAL_MATRIX_MAX_ZONES
+        )
+    
     def get_alternative_zones(
         self,
         current_zone_id: int,
@@ -112,7 +98,7 @@ class RecommendationService:
             hour: Hour of day (0-23)
             day_of_week: Day of week (0=Monday, 6=Sunday)
             current_availability_level: Current zone's availability (High/Medium/Low)
-            events: List of events affecting zones
+            events: Events on date_str in any zone; each candidate is scored with its own
             max_recommendations: Maximum number of recommendations to return
             max_distance_km: Maximum distance in kilometers for recommendations
         
@@ -130,7 +116,7 @@ class RecommendationService:
             logger.info(f"   Model: {prediction_service._ml_model_path}")
             logger.info(f"   Data: {prediction_service._ml_data_dir}")
         
-        if current_zone_id not in self.ZONE_COORDINATES:
+        if current_zone_id not in self.spatial_index:
             logger.warning(f"Invalid zone_id: {current_zone_id}")
             return []
         
@@ -144,98 +130,76 @@ class RecommendationService:
         
         logger.info(f"Finding alternatives for Zone {current_zone_id} ({current_zone['name']}) with {current_availability_level} availability")
         
-        recommendations = []
-        ml_predictions_count = 0
-        fallback_predictions_count = 0
-        
-        # Get predictions for all other zones
-        for zone_id, zone_info in self.ZONE_COORDINATES.items():
-            if zone_id == current_zone_id:
-                continue
-            
-            # Calculate distance
-            distance = calculate_distance(
-                current_zone["lat"], current_zone["lng"],
-                zone_info["lat"], zone_info["lng"]
+        # Zones within range, nearest first
+        zone_ids, distances = self.spatial_index.within(current_zone_id, max_distance_km)
+        if len(zone_ids) == 0:
+            logger.info(f"No zones within {max_distance_km} km of Zone {current_zone_id}")
+            return []
+        
+        # Score every candidate with one batched prediction
+        items = [
+            {"zone_id": zone_id, "date": date_str, "hour": hour, "day_of_week": day_of_week}
+            for zone_id in zone_ids.tolist()
+        ]
+        events_by_zone_date = {}
+        for event in events or []:
+            events_by_zone_date.setdefault((event.zone_id, event.date), []).append(event)
+        try:
+            predictions = prediction_service.predict_occupancy_batch(
+                items,
+                events_by_zone_date,
+                # Candidates are ranked on availability alone
+                include_features=False
             )
-            
-            # Skip if too far
-            if distance > max_distance_km:
-                continue
-            
-            # Get ML prediction for this zone
-            try:
-                prediction = prediction_service.predict_occupancy(
-                    zone_id=zone_id,
-                    date_str=date_str,
-                    hour=hour,
-                    day_of_week=day_of_week,
-                    events=events or []
-                )
-                
-                # VALIDATION: Check if ML was actually used
-                if prediction_service.ml_available:
-                    ml_predictions_count += 1
-                    logger.debug(f"  ✅ Zone {zone_id}: ML prediction = {prediction['occupancy']:.1f}% occupancy")
-                else:
-                    fallback_predictions_count += 1
-                    logger.warning(f"  ⚠️  Zone {zone_id}: Using FALLBACK (not ML)")
-                
-                availability_level = prediction["availability_level"]
-                availability_score = get_availability_score(availability_level)
-                
-                # Only recommend zones with better availability
-                if availability_score <= current_score:
-                    continue
-                
-                # Calculate recommendation score
-                # Higher score = better recommendation
-                availability_improvement = availability_score - current_score
-                distance_penalty = distance / max_distance_km
-                
-                # Weighted scoring: 70% availability improvement, 30% proximity
-                recommendation_score = (availability_improvement * 0.7) - (distance_penalty * 0.3)
-                
-                # Generate reason
-                reason = generate_recommendation_reason(
-                    alternative_zone={"features": prediction.get("features", {})},
-                    current_zone={"features": {}},
-                    distance=distance,
-                    availability_improvement=availability_improvement
-                )
-                
-                recommendations.append({
-                    "zone_id": zone_id,
-                    "zone_name": zone_info["name"],
-                    "availability_level": availability_level,
-                    "occupancy": prediction["occupancy"],
-                    "confidence": prediction["confidence"],
-                    "distance_km": distance,
-                    "distance_display": f"{distance:.1f} km" if distance >= 1 else f"{int(distance * 1000)} m",
-                    "recommendation_score": recommendation_score,
-                    "reason": reason,
-                    "improvement": availability_improvement
-                })
-                
-            except Exception as e:
-                logger.error(f"Error predicting for zone {zone_id}: {e}")
-                continue
-        
-        # Log prediction method summary
-        total_predictions = ml_predictions_count + fallback_predictions_count
-        if total_predictions > 0:
-            ml_percentage = (ml_predictions_count / total_predictions) * 100
-            logger.info(f"📊 Prediction Summary: {ml_predictions_count}/{total_predictions} used ML ({ml_percentage:.0f}%)")
-            if fallback_predictions_count > 0:
-                logger.warning(f"⚠️  {fallback_predictions_count} predictions used FALLBACK instead of ML!")
-        
-        # Sort by recommendation score (highest first)
-        recommendations.sort(key=lambda x: x["recommendation_score"], reverse=True)
-        
-        logger.info(f"Found {len(recommendations)} better alternatives, returning top {max_recommendations}")
+        except Exception as e:
+            logger.error(f"Error predicting for zones {zone_ids.tolist()}: {e}")
+            return []
+        
+        # VALIDATION: Check if ML was actually used
+        ml_predictions_count = sum(1 for prediction in predictions if prediction.get("ml_used"))
+        ml_percentage = (ml_predictions_count / len(predictions)) * 100
+        logger.info(f"📊 Prediction Summary: {ml_predictions_count}/{len(predictions)} used ML ({ml_percentage:.0f}%)")
+        if ml_predictions_count < len(predictions):
+            logger.warning(f"⚠️  {len(predictions) - ml_predictions_count} predictions used FALLBACK instead of ML!")
+        
+        availability_scores = np.array(
+            [get_availability_score(prediction["availability_level"]) for prediction in predictions]
+        )
+        
+        # Higher score = better recommendation
+        # Weighted scoring: 70% availability improvement, 30% proximity
+        availability_improvements = availability_scores - current_score
+        recommendation_scores = (availability_improvements * 0.7) - (distances / max_distance_km * 0.3)
+        
+        # Only recommend zones with better availability, best score first
+        better = np.flatnonzero(availability_improvements > 0)
+        ranked = better[np.argsort(-recommendation_scores[better], kind="stable")]
+        
+        logger.info(f"Found {len(ranked)} better alternatives, returning top {max_recommendations}")
         
         # Return top N recommendations
-        return recommendations[:max_recommendations]
+        top = ranked[:max_recommendations]
+        reasons = generate_recommendation_reasons(distances[top], availability_improvements[top])
+        
+        recommendations = []
+        for i, reason in zip(top.tolist(), reasons):
+            zone_id = int(zone_ids[i])
+            distance = float(distances[i])
+            prediction = predictions[i]
+            recommendations.append({
+                "zone_id": zone_id,
+                "zone_name": self.ZONE_COORDINATES[zone_id]["name"],
+                "availability_level": prediction["availability_level"],
+                "occupancy": prediction["occupancy"],
+                "confidence": prediction["confidence"],
+                "distance_km": distance,
+                "distance_display": f"{distance:.1f} km" if distance >= 1 else f"{int(distance * 1000)} m",
+                "recommendation_score": float(recommendation_scores[i]),
+                "reason": reason,
+                "improvement": int(availability_improvements[i])
+            })
+        
+        return recommendations
 
 
 # Singleton instance
@@ -0,0 +1,101 @@
+"""Radius queries over static zone coordinates."""
+from typing import Dict, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+
+
+def haversine_matrix(lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+    """Pairwise great-circle distances in kilometers.
+
+    Args:
+        lat: Latitudes in degrees
+        lng: Longitudes in degrees
+
+    Returns:
+        (n, n) array of distances
+    """
+    lat_rad = np.radians(lat)
+    lng_rad = np.radians(lng)
+    delta_lat = lat_rad[:, None] - lat_rad[None, :]
+    delta_lng = lng_rad[:, None] - lng_rad[None, :]
+
+    a = (np.sin(delta_lat / 2) ** 2 +
+         np.cos(lat_rad)[:, None] * np.cos(lat_rad)[None, :] *
+         np.sin(delta_lng / 2) ** 2)
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class ZoneSpatialIndex:
+    """Find zones within a radius of another zone.
+
+    Up to matrix_max_zones zones, all pairwise distances are computed once
+    and a query is a row scan. Larger zone sets use a haversine BallTree so
+    memory stays linear and queries only visit nearby zones.
+
+    Distances are rounded to 0.01 km before comparing with the radius.
+    """
+
+    def __init__(self, zones: Dict[int, Dict], matrix_max_zones: int = 1000):
+        """
+        Args:
+            zones: Zone ID -> dict with "lat" and "lng" in degrees
+            matrix_max_zones: Largest zone count served from a distance matrix
+        """
+        self.zone_ids = np.array(list(zones), dtype=np.int64)
+        self._positions = {zone_id: i for i, zone_id in enumerate(zones)}
+        lat = np.array([zone["lat"] for zone in zones.values()], dtype=np.float64)
+        lng = np.array([zone["lng"] for zone in zones.values()], dtype=np.float64)
+
+        self._distances = None
+        self._tree = None
+        if len(self.zone_ids) <= matrix_max_zones:
+            self._distances = np.round(haversine_matrix(lat, lng), 2)
+        else:
+            from sklearn.neighbors import BallTree
+            self._points = np.radians(np.column_stack([lat, lng]))
+            self._tree = BallTree(self._points, metric="haversine")
+
+    @property
+    def mode(self) -> str:
+        """"matrix" or "balltree"."""
+        return "matrix" if self._distances is not None else "balltree"
+
+    def __contains__(self, zone_id: int) -> bool:
+        return zone_id in self._positions
+
+    def within(self, zone_id: int, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Zones within radius_km of zone_id, nearest first, excluding zone_id itself.
+
+        Args:
+            zone_id: Center zone
+            radius_km: Search radius in kilometers
+
+        Returns:
+            (zone IDs, distances in km) arrays
+
+        Raises:
+            KeyError: If zone_id is not indexed
+        """
+        center = self._positions[zone_id]
+        if self._distances is not None:
+            distances = self._distances[center]
+            positions = np.flatnonzero(distances <= radius_km)
+            distances = distances[positions]
+        else:
+            # Pad by the rounding step so every zone that rounds into the radius is returned
+            positions, distances = self._tree.query_radius(
+                self._points[center:center + 1],
+                r=(radius_km + 0.005) / EARTH_RADIUS_KM,
+                return_distance=True
+            )
+            positions = positions[0]
+            distances = np.round(distances[0] * EARTH_RADIUS_KM, 2)
+            keep = distances <= radius_km
+            positions, distances = positions[keep], distances[keep]
+
+        keep = positions != center
+        positions, distances = positions[keep], distances[keep]
+        order = np.argsort(distances, kind="stable")
+        return self.zone_ids[positions[order]], distances[order]
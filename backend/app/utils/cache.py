@@ -0,0 +1,14 @@
+"""API response caches, using the ML layer's TTL/LRU cache."""
+import os
+import sys
+
+_ML_SRC = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "ml", "src"
+)
+if _ML_SRC not in sys.path:
+    sys.path.insert(0, _ML_SRC)
+
+from cache import TTLCache  # noqa: E402
+
+__all__ = ["TTLCache"]
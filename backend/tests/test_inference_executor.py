@@ -0,0 +1,19 @@
+"""Tests for the bounded inference executor."""
+import asyncio
+
+import pytest
+
+from app.services.inference_executor import InferenceExecutor
+
+
+def test_submit_after_shutdown_releases_slot():
+    executor = InferenceExecutor(max_workers=1, max_queue=0, timeout_s=1)
+    executor.shutdown()
+
+    async def submit():
+        with pytest.raises(RuntimeError):
+            await executor.run(sum, [1, 2])
+
+    asyncio.run(submit())
+    assert executor._in_flight == 0
+    assert executor.stats()["queued"] == 0
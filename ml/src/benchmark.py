@@ -0,0 +1,71 @@
+"""
+Benchmark flat-forest inference against sklearn's RandomForestRegressor.predict
+"""
+import time
+import argparse
+import joblib
+import numpy as np
+import pandas as pd
+
+import predict
+from features import extract_features_batch
+from config import ZONES
+
+
+def time_call(fn, X, repeats):
+    """Median latency of fn(X) in milliseconds"""
+    fn(X)  # warm-up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(X)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def sample_features(n, seed=42):
+    """Feature rows for random zones and hours across the loaded history"""
+    rng = np.random.default_rng(seed)
+    runtime = predict.load_model()
+    history = runtime['historical_df']['datetime']
+    hours = pd.date_range(history.min().floor('h'), history.max().floor('h'), freq='h')
+    zone_ids = rng.choice(ZONES, size=n)
+    datetimes = hours[rng.integers(0, len(hours), size=n)]
+    return extract_features_batch(
+        zone_ids, datetimes, runtime['historical_df'], runtime['events_df'],
+        cube=runtime['historical_cube'], lag_index=runtime['lag_index'], event_index=runtime['event_index']
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flat forest vs sklearn inference benchmark")
+    parser.add_argument('--model-path', default=None)
+    parser.add_argument('--data-dir', default=None)
+    parser.add_argument('--repeats', type=int, default=50)
+    args = parser.parse_args()
+
+    runtime = predict.load_model(model_path=args.model_path, data_dir=args.data_dir)
+    forest = runtime['forest']
+    sklearn_model = runtime['model']
+    if sklearn_model is None:
+        # The memory-mapped artifact was loaded; read the pickle for comparison
+        sklearn_model = joblib.load(runtime['model_file'])
+
+    X = sample_features(1000)
+    max_diff = np.abs(sklearn_model.predict(X) - forest.predict(X)).max()
+    print(f"Trees: {forest.n_trees}, nodes: {len(forest.value)}, max |sklearn - flat|: {max_diff:.2e}")
+
+    print(f"\n{'batch':>8} {'sklearn (n_jobs=1)':>20} {'sklearn (n_jobs=-1)':>20} {'flat forest':>12}")
+    for n in (1, 1000):
+        batch = X[:n]
+        sklearn_model.n_jobs = 1
+        serial = time_call(sklearn_model.predict, batch, args.repeats)
+        sklearn_model.n_jobs = -1
+        parallel = time_call(sklearn_model.predict, batch, args.repeats)
+        sklearn_model.n_jobs = 1
+        flat = time_call(forest.predict, batch, args.repeats)
+        print(f"{n:>8} {serial:>17.3f} ms {parallel:>17.3f} ms {flat:>9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
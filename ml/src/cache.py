@@ -0,0 +1,90 @@
+"""
+Bounded LRU cache with TTL expiry, shared by the prediction features and
+the backend's API response caches
+"""
+import time
+import threading
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after a TTL
+    
+    Args:
+        maxsize: Maximum number of entries; least recently used are evicted
+        ttl_seconds: Entry lifetime in seconds
+    """
+    
+    def __init__(self, maxsize=4096, ttl_seconds=900):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._hit_ms = 0.0
+        self._miss_ms = 0.0
+    
+    def get(self, key):
+        """Return the cached value for key, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key, value):
+        """Store value under key, evicting the least recently used entry if full"""
+        if self.maxsize <= 0:
+            return
+        
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def record_latency(self, hit, seconds):
+        """Add the end-to-end time of a request served from (hit) or past (miss) the cache"""
+        with self._lock:
+            if hit:
+                self._hit_ms += seconds * 1000
+            else:
+                self._miss_ms += seconds * 1000
+    
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        """Hit/miss/eviction counters, current size and recorded latencies"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'avg_hit_ms': round(self._hit_ms / self.hits, 3) if self.hits else 0.0,
+                'avg_miss_ms': round(self._miss_ms / self.misses, 3) if self.misses else 0.0
+            }
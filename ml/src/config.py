@@ -63,7 +63,14 @@ MODEL_PARAMS = {
     'n_jobs': -1
 }
 
+# Quantiles of per-tree predictions used as the prediction interval
+PREDICTION_QUANTILES = (0.1, 0.9)
+
 # Paths
 DATA_RAW_PATH = 'ml/data/raw/'
 DATA_PROCESSED_PATH = 'ml/data/processed/'
 MODEL_PATH = 'ml/models/'
+
+# Feature cache for predict_occupancy_at_time (entries, seconds)
+FEATURE_CACHE_SIZE = 4096
+FEATURE_CACHE_TTL_SECONDS = 900
@@ -1,10 +1,12 @@
 """
 Feature engineering for parking prediction
 """
+import json
 import pandas as pd
 import numpy as np
+from bisect import bisect_left
 from datetime import datetime, timedelta
-from config import ZONE_TYPE_ENCODING, ZONE_METADATA
+from config import ZONE_TYPE_ENCODING, ZONE_METADATA, FEATURE_NAMES
 
 
 def extract_temporal_features(dt):
@@ -18,7 +20,53 @@ def extract_temporal_features(dt):
     }
 
 
-def get_historical_features(zone_id, target_dt, historical_df):
+def build_historical_cube(historical_df):
+    """
+    Precompute per-zone statistics keyed by weekday x hour
+    
+    Built once at load time so historical lookups are O(1) per prediction
+    instead of a full-table scan.
+    
+    Args:
+        historical_df: Historical parking data
+    
+    Returns:
+        dict with zone_index (zone_id -> row), and mean/std/count arrays of
+        shape (n_zones, 7, 24) plus the zone-level fallback mean (n_zones,)
+    """
+    codes, zones = pd.factorize(historical_df['blockface_id'])
+    zone_index = {zone_id: i for i, zone_id in enumerate(zones)}
+    n_zones = len(zones)
+    
+    datetimes = historical_df['datetime']
+    slot = (codes * 7 + datetimes.dt.weekday.values) * 24 + datetimes.dt.hour.values
+    values = historical_df['occupancy_rate'].values.astype(np.float64)
+    n_slots = n_zones * 7 * 24
+    
+    count = np.bincount(slot, minlength=n_slots)
+    total = np.bincount(slot, weights=values, minlength=n_slots)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+        # Two-pass variance (ddof=1) to match pandas .std()
+        sq_dev = np.bincount(slot, weights=(values - mean[slot]) ** 2, minlength=n_slots)
+        std = np.sqrt(sq_dev / (count - 1))
+    std[count < 2] = np.nan
+    
+    zone_count = np.bincount(codes, minlength=n_zones)
+    zone_total = np.bincount(codes, weights=values, minlength=n_zones)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        zone_mean = zone_total / zone_count
+    
+    return {
+        'zone_index': zone_index,
+        'mean': mean.reshape(n_zones, 7, 24),
+        'std': std.reshape(n_zones, 7, 24),
+        'count': count.reshape(n_zones, 7, 24),
+        'zone_mean': zone_mean
+    }
+
+
+def get_historical_features(zone_id, target_dt, historical_df, cube=None, lag_index=None):
     """
     Calculate historical patterns for this zone/time
     
@@ -26,10 +74,17 @@ def get_historical_features(zone_id, target_dt, historical_df):
         zone_id: Zone identifier
         target_dt: Target datetime
         historical_df: Historical parking data
+        cube: Optional precomputed cube from build_historical_cube
+        lag_index: Optional precomputed index from build_lag_index
     
     Returns:
         dict with historical features
     """
+    if cube is None:
+        cube = build_historical_cube(historical_df)
+    if lag_index is None:
+        lag_index = build_lag_index(historical_df)
+    
     # Ensure target_dt is a datetime object, not a Series
     if hasattr(target_dt, 'weekday'):
         # It's a datetime-like object
@@ -40,43 +95,37 @@ def get_historical_features(zone_id, target_dt, historical_df):
         target_weekday = 0
         target_hour = 12
     
-    # Filter to same zone, hour, and day of week
-    same_pattern = historical_df[
-        (historical_df['blockface_id'] == zone_id) &
-        (historical_df['datetime'].dt.hour == target_hour) &
-        (historical_df['datetime'].dt.weekday == target_weekday)
-    ]
+    zone_idx = cube['zone_index'].get(zone_id)
     
-    if len(same_pattern) > 0:
-        avg_same_hour = same_pattern['occupancy_rate'].mean()
-        std_same_hour = same_pattern['occupancy_rate'].std()
+    # Same zone, hour, and day of week
+    if zone_idx is not None and cube['count'][zone_idx, target_weekday, target_hour] > 0:
+        avg_same_hour = cube['mean'][zone_idx, target_weekday, target_hour]
+        std_same_hour = cube['std'][zone_idx, target_weekday, target_hour]
     else:
         # Fallback to overall average
-        zone_data = historical_df[historical_df['blockface_id'] == zone_id]
-        avg_same_hour = zone_data['occupancy_rate'].mean() if len(zone_data) > 0 else 0.5
+        avg_same_hour = cube['zone_mean'][zone_idx] if zone_idx is not None else 0.5
         std_same_hour = 0.15
     
     # Calculate 24h trend (use relative matching if no exact data)
-    recent_data = historical_df[
-        (historical_df['blockface_id'] == zone_id) &
-        (historical_df['datetime'] >= target_dt - timedelta(hours=24)) &
-        (historical_df['datetime'] < target_dt)
-    ].sort_values('datetime')
-    
-    if len(recent_data) >= 2:
-        trend_24h = recent_data['occupancy_rate'].iloc[-1] - recent_data['occupancy_rate'].iloc[0]
+    lag_zone_idx = lag_index['zone_index'].get(zone_id)
+    lo = hi = 0
+    if lag_zone_idx is not None:
+        lo, hi = _window_bounds(
+            lag_index, lag_zone_idx, target_dt - timedelta(hours=24), target_dt, closed_right=False
+        )
+    
+    if hi - lo >= 2:
+        occupancy = lag_index['occupancy']
+        trend_24h = float(occupancy[hi - 1]) - float(occupancy[lo])
     else:
         # Use historical pattern: compare current hour vs 24h ago (same day of week)
-        current_pattern = same_pattern  # Already filtered above
         prev_hour = target_hour - 1 if target_hour > 0 else 23
-        prev_pattern = historical_df[
-            (historical_df['blockface_id'] == zone_id) &
-            (historical_df['datetime'].dt.hour == prev_hour) &
-            (historical_df['datetime'].dt.weekday == target_weekday)
-        ]
         
-        if len(current_pattern) > 0 and len(prev_pattern) > 0:
-            trend_24h = current_pattern['occupancy_rate'].mean() - prev_pattern['occupancy_rate'].mean()
+        if (zone_idx is not None and
+                cube['count'][zone_idx, target_weekday, target_hour] > 0 and
+                cube['count'][zone_idx, target_weekday, prev_hour] > 0):
+            trend_24h = (cube['mean'][zone_idx, target_weekday, target_hour] -
+                         cube['mean'][zone_idx, target_weekday, prev_hour])
         else:
             trend_24h = 0.0
     
@@ -87,7 +136,81 @@ def get_historical_features(zone_id, target_dt, historical_df):
     }
 
 
-def get_lag_features(zone_id, target_dt, historical_df):
+def build_lag_index(historical_df, recent_matches=10):
+    """
+    Build a per-zone, time-sorted index of occupancy readings
+    
+    Each zone owns a contiguous slice [offsets[i], offsets[i + 1]) of the
+    datetime64/float32 arrays, so window means are two searchsorted calls
+    plus a prefix-sum difference, independent of history size.
+    
+    Args:
+        historical_df: Historical parking data
+        recent_matches: Number of most recent same weekday/hour readings
+            averaged for the relative-match fallback
+    
+    Returns:
+        dict with zone_index, offsets, times, occupancy, prefix (float64
+        cumulative sum with a leading 0), recent_slot_mean (n_zones, 7, 24)
+        and zone_mean (n_zones,)
+    """
+    codes, zones = pd.factorize(historical_df['blockface_id'])
+    zone_index = {zone_id: i for i, zone_id in enumerate(zones)}
+    n_zones = len(zones)
+    
+    times = historical_df['datetime'].values.astype('datetime64[ns]')
+    order = np.lexsort((times, codes))
+    codes = codes[order]
+    times = np.ascontiguousarray(times[order])
+    occupancy = np.ascontiguousarray(
+        historical_df['occupancy_rate'].values[order], dtype=np.float32
+    )
+    values = occupancy.astype(np.float64)
+    
+    zone_count = np.bincount(codes, minlength=n_zones)
+    offsets = np.zeros(n_zones + 1, dtype=np.int64)
+    np.cumsum(zone_count, out=offsets[1:])
+    prefix = np.zeros(len(values) + 1, dtype=np.float64)
+    np.cumsum(values, out=prefix[1:])
+    
+    # Mean of the most recent readings per (zone, weekday, hour) slot.
+    # Rows are time-sorted within each zone, so a stable sort by slot keeps
+    # every slot's readings in time order and the last ones are the newest.
+    stamps = pd.DatetimeIndex(times)
+    slot = (codes * 7 + stamps.weekday.values) * 24 + stamps.hour.values
+    n_slots = n_zones * 7 * 24
+    by_slot = np.argsort(slot, kind='stable')
+    slot_count = np.bincount(slot, minlength=n_slots)
+    slot_end = np.cumsum(slot_count)
+    rank_from_end = slot_end[slot[by_slot]] - 1 - np.arange(len(by_slot))
+    recent = by_slot[rank_from_end < recent_matches]
+    recent_total = np.bincount(slot[recent], weights=values[recent], minlength=n_slots)
+    recent_count = np.bincount(slot[recent], minlength=n_slots)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        recent_slot_mean = recent_total / recent_count
+        zone_mean = (prefix[offsets[1:]] - prefix[offsets[:-1]]) / zone_count
+    
+    return {
+        'zone_index': zone_index,
+        'offsets': offsets,
+        'times': times,
+        'occupancy': occupancy,
+        'prefix': prefix,
+        'recent_slot_mean': recent_slot_mean.reshape(n_zones, 7, 24),
+        'zone_mean': zone_mean
+    }
+
+
+def _window_bounds(lag_index, zone_idx, start, end, closed_right=True):
+    """Global [lo, hi) positions of a zone's readings between start and end"""
+    lo_zone, hi_zone = lag_index['offsets'][zone_idx], lag_index['offsets'][zone_idx + 1]
+    zone_times = lag_index['times'][lo_zone:hi_zone]
+    lo = np.searchsorted(zone_times, np.datetime64(start, 'ns'), side='left')
+    hi = np.searchsorted(zone_times, np.datetime64(end, 'ns'), side='right' if closed_right else 'left')
+    return lo_zone + lo, lo_zone + hi
+
+
+def get_lag_features(zone_id, target_dt, historical_df, lag_index=None):
     """
     Get occupancy at previous time points (lag features)
     Uses relative date matching when exact dates aren't available
@@ -96,41 +219,37 @@ def get_lag_features(zone_id, target_dt, historical_df):
         zone_id: Zone identifier
         target_dt: Target datetime
         historical_df: Historical parking data
+        lag_index: Optional precomputed index from build_lag_index
     
     Returns:
         dict with lag features
     """
+    if lag_index is None:
+        lag_index = build_lag_index(historical_df)
+    
+    zone_idx = lag_index['zone_index'].get(zone_id)
+    
     def get_occupancy_at(dt):
         """Helper to get occupancy at specific datetime or closest historical match"""
-        # First try exact match (for dates within historical range)
-        data = historical_df[
-            (historical_df['blockface_id'] == zone_id) &
-            (historical_df['datetime'] >= dt - timedelta(minutes=30)) &
-            (historical_df['datetime'] <= dt + timedelta(minutes=30))
-        ]
-        if len(data) > 0:
-            return data['occupancy_rate'].mean()
+        if zone_idx is None:
+            return 0.5  # Ultimate fallback
         
-        # If no exact match, use relative matching (same day_of_week + hour from historical data)
-        target_weekday = dt.weekday()
-        target_hour = dt.hour
-        
-        relative_match = historical_df[
-            (historical_df['blockface_id'] == zone_id) &
-            (historical_df['datetime'].dt.weekday == target_weekday) &
-            (historical_df['datetime'].dt.hour == target_hour)
-        ]
+        # First try exact match (for dates within historical range)
+        lo, hi = _window_bounds(
+            lag_index, zone_idx, dt - timedelta(minutes=30), dt + timedelta(minutes=30)
+        )
+        if hi > lo:
+            prefix = lag_index['prefix']
+            return (prefix[hi] - prefix[lo]) / (hi - lo)
         
-        if len(relative_match) > 0:
-            # Use the most recent matching pattern
-            return relative_match.nlargest(10, 'datetime')['occupancy_rate'].mean()
+        # If no exact match, use the most recent readings at the same
+        # day_of_week + hour from historical data
+        recent_mean = lag_index['recent_slot_mean'][zone_idx, dt.weekday(), dt.hour]
+        if not np.isnan(recent_mean):
+            return recent_mean
         
         # Final fallback: zone average
-        zone_data = historical_df[historical_df['blockface_id'] == zone_id]
-        if len(zone_data) > 0:
-            return zone_data['occupancy_rate'].mean()
-        
-        return 0.5  # Ultimate fallback
+        return lag_index['zone_mean'][zone_idx]
     
     return {
         'occupancy_1h_ago': get_occupancy_at(target_dt - timedelta(hours=1)),
@@ -139,61 +258,94 @@ def get_lag_features(zone_id, target_dt, historical_df):
     }
 
 
-def get_event_features(zone_id, target_dt, events_df):
+def parse_nearby_zones(nearby_zones):
+    """Normalize an event's nearby_zones value to a list of zone ids"""
+    # Convert to list if it's a string (shouldn't happen but defensive)
+    if isinstance(nearby_zones, str):
+        # Try to parse as JSON array
+        try:
+            nearby_zones = json.loads(nearby_zones.replace("'", '"'))
+        except ValueError:
+            nearby_zones = []
+    
+    return nearby_zones if isinstance(nearby_zones, list) else []
+
+
+def explode_events(events_df):
     """
-    Check for nearby events
+    Flatten events into one row per affected zone
     
     Args:
-        zone_id: Zone identifier
-        target_dt: Target datetime
         events_df: Events dataframe
     
     Returns:
-        dict with event features
+        DataFrame with blockface_id, event_date (midnight) and event_start
     """
+    columns = ['blockface_id', 'event_date', 'event_start']
     if len(events_df) == 0:
-        return {
-            'has_event': 0,
-            'hours_until_event': 99
-        }
+        return pd.DataFrame(columns=columns)
     
-    # Check if this zone is affected by any event
-    # Filter events where zone_id is in the nearby_zones list
-    nearby_events = []
-    for idx, row in events_df.iterrows():
-        nearby_zones = row['nearby_zones']
-        # Convert to list if it's a string (shouldn't happen but defensive)
-        if isinstance(nearby_zones, str):
-            # Try to parse as JSON array
-            import json
-            try:
-                nearby_zones = json.loads(nearby_zones.replace("'", '"'))
-            except:
-                nearby_zones = []
-        
-        # Check if zone is in the list
-        if isinstance(nearby_zones, list) and zone_id in nearby_zones:
-            nearby_events.append(row)
+    # Compacted event tables carry a pre-parsed event_start column
+    if 'event_start' in events_df:
+        event_start = events_df['event_start'].astype('datetime64[ns]')
+    else:
+        event_start = pd.to_datetime(
+            events_df['date'] + ' ' + events_df['start_time']
+        ).astype('datetime64[ns]')
+    events = pd.DataFrame({
+        'blockface_id': events_df['nearby_zones'].map(parse_nearby_zones),
+        'event_start': event_start
+    })
+    events = events.explode('blockface_id').dropna(subset=['blockface_id'])
+    events['event_date'] = events['event_start'].dt.normalize()
+    
+    return events[columns].drop_duplicates().reset_index(drop=True)
+
+
+def build_event_index(events_df):
+    """
+    Build an inverted index of event start times
     
-    if len(nearby_events) == 0:
-        return {
-            'has_event': 0,
-            'hours_until_event': 99
-        }
+    Args:
+        events_df: Events dataframe
     
-    # Convert to DataFrame for easier processing
-    nearby_events_df = pd.DataFrame(nearby_events)
+    Returns:
+        dict mapping (zone_id, date) -> sorted list of event start datetimes
+    """
+    event_index = {}
+    events = explode_events(events_df)
+    for zone_id, event_start in zip(events['blockface_id'], events['event_start']):
+        event_index.setdefault((zone_id, event_start.date()), []).append(event_start)
     
-    # Find events on the same day
-    target_date = target_dt.date()
-    today_events = nearby_events_df[
-        pd.to_datetime(nearby_events_df['date']).dt.date == target_date
-    ]
+    for starts in event_index.values():
+        starts.sort()
+    
+    return event_index
+
+
+def get_event_features(zone_id, target_dt, events_df, event_index=None):
+    """
+    Check for nearby events
+    
+    Args:
+        zone_id: Zone identifier
+        target_dt: Target datetime
+        events_df: Events dataframe
+        event_index: Optional precomputed index from build_event_index
+    
+    Returns:
+        dict with event features
+    """
+    if event_index is None:
+        event_index = build_event_index(events_df)
     
-    if len(today_events) > 0:
-        # Get the closest event
-        event = today_events.iloc[0]
-        event_datetime = pd.to_datetime(f"{event['date']} {event['start_time']}")
+    # Events affecting this zone on the same day
+    starts = event_index.get((zone_id, target_dt.date()))
+    
+    if starts:
+        # Get the closest event (earlier one on a tie)
+        pos = bisect_left(starts, target_dt)
+        event_datetime = min(starts[max(pos - 1, 0):pos + 1], key=lambda start: abs(start - target_dt))
         hours_until = (event_datetime - target_dt).total_seconds() / 3600
         
         return {
@@ -226,7 +378,8 @@ def get_zone_features(zone_id):
     }
 
 
-def extract_all_features(zone_id, target_dt, historical_df, events_df):
+def extract_all_features(zone_id, target_dt, historical_df, events_df, cube=None, lag_index=None,
+                         event_index=None):
     """
     Extract all 15 features for a prediction
     
@@ -235,6 +388,9 @@ def extract_all_features(zone_id, target_dt, historical_df, events_df):
         target_dt: Target datetime to predict
         historical_df: Historical parking data
         events_df: Events dataframe
+        cube: Optional precomputed cube from build_historical_cube
+        lag_index: Optional precomputed index from build_lag_index
+        event_index: Optional precomputed index from build_event_index
     
     Returns:
         list of 15 feature values in correct order
@@ -245,13 +401,13 @@ def extract_all_features(zone_id, target_dt, historical_df, events_df):
     features.update(extract_temporal_features(target_dt))
     
     # Historical (3 features)
-    features.update(get_historical_features(zone_id, target_dt, historical_df))
+    features.update(get_historical_features(zone_id, target_dt, historical_df, cube, lag_index))
     
     # Lag (3 features)
-    features.update(get_lag_features(zone_id, target_dt, historical_df))
+    features.update(get_lag_features(zone_id, target_dt, historical_df, lag_index))
     
     # Event (2 features)
-    features.update(get_event_features(zone_id, target_dt, events_df))
+    features.update(get_event_features(zone_id, target_dt, events_df, event_index))
     
     # Zone (2 features)
     features.update(get_zone_features(zone_id))
@@ -268,25 +424,316 @@ def extract_all_features(zone_id, target_dt, historical_df, events_df):
     return [features[key] for key in feature_order]
 
 
-def create_training_dataset(historical_df, events_df):
+def _batch_window_bounds(lag_index, zone_codes, starts, ends, closed_right=True):
+    """Vectorized _window_bounds: one searchsorted pass per zone in the batch"""
+    lo = np.zeros(len(zone_codes), dtype=np.int64)
+    hi = np.zeros(len(zone_codes), dtype=np.int64)
+    offsets = lag_index['offsets']
+    
+    order = np.argsort(zone_codes, kind='stable')
+    batch_zones, group_starts = np.unique(zone_codes[order], return_index=True)
+    group_ends = np.append(group_starts[1:], len(order))
+    
+    for zone_idx, start, end in zip(batch_zones, group_starts, group_ends):
+        if zone_idx < 0:
+            continue
+        rows = order[start:end]
+        zone_times = lag_index['times'][offsets[zone_idx]:offsets[zone_idx + 1]]
+        lo[rows] = offsets[zone_idx] + np.searchsorted(zone_times, starts[rows], side='left')
+        hi[rows] = offsets[zone_idx] + np.searchsorted(
+            zone_times, ends[rows], side='right' if closed_right else 'left'
+        )
+    
+    return lo, hi
+
+
+def _batch_recent_trend(lag_index, lag_codes, targets):
+    """Last minus first reading in [t - 24h, t) and whether >= 2 readings exist"""
+    occupancy = lag_index['occupancy']
+    lo, hi = _batch_window_bounds(
+        lag_index, lag_codes, targets - np.timedelta64(24, 'h'), targets, closed_right=False
+    )
+    if len(occupancy) == 0:
+        return np.zeros(len(lag_codes)), np.zeros(len(lag_codes), dtype=bool)
+    
+    last = occupancy[np.clip(hi - 1, 0, len(occupancy) - 1)].astype(np.float64)
+    first = occupancy[np.clip(lo, 0, len(occupancy) - 1)].astype(np.float64)
+    return last - first, hi - lo >= 2
+
+
+def build_slot_history(lag_index):
+    """
+    Order a lag index's readings by (zone, weekday, hour) slot, then time
+    
+    Lets training look up slot statistics as of each record's timestamp, so
+    fallbacks only see readings strictly before the record (serving already
+    only has past readings).
+    
+    Args:
+        lag_index: Index from build_lag_index
+    
+    Returns:
+        dict with unique_times, keys (slot * (len(unique_times) + 1) + time
+        rank, sorted), prefix (float64 cumulative sum with a leading 0) and
+        slot_start (first position of every slot)
+    """
+    offsets = lag_index['offsets']
+    n_zones = len(offsets) - 1
+    times = lag_index['times']
+    codes = np.repeat(np.arange(n_zones), np.diff(offsets))
+    stamps = pd.DatetimeIndex(times)
+    slot = (codes * 7 + stamps.weekday.values) * 24 + stamps.hour.values
+    
+    unique_times = np.unique(times)
+    stride = len(unique_times) + 1
+    keys = slot.astype(np.int64) * stride + np.searchsorted(unique_times, times)
+    order = np.argsort(keys, kind='stable')
+    prefix = np.zeros(len(order) + 1, dtype=np.float64)
+    np.cumsum(lag_index['occupancy'][order].astype(np.float64), out=prefix[1:])
+    
+    return {
+        'unique_times': unique_times,
+        'keys': keys[order],
+        'prefix': prefix,
+        'slot_start': np.searchsorted(keys[order], np.arange(n_zones * 7 * 24 + 1) * stride)
+    }
+
+
+def _slot_stats_as_of(slot_history, lag_codes, weekday, hour, as_of, recent_matches=10):
+    """
+    Per-row slot statistics over the readings strictly before as_of
+    
+    Returns:
+        (mean of the newest recent_matches readings, mean of all readings,
+        reading count); means are NaN where the count is 0
+    """
+    known = lag_codes >= 0
+    stride = len(slot_history['unique_times']) + 1
+    slot = (np.where(known, lag_codes, 0) * 7 + weekday) * 24 + hour
+    query = slot.astype(np.int64) * stride + np.searchsorted(slot_history['unique_times'], as_of, side='left')
+    end = np.searchsorted(slot_history['keys'], query, side='left')
+    start = slot_history['slot_start'][slot]
+    count = np.where(known, end - start, 0)
+    
+    prefix = slot_history['prefix']
+    recent = np.minimum(count, recent_matches)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        recent_mean = (prefix[end] - prefix[end - recent]) / recent
+        slot_mean = (prefix[end] - prefix[start]) / count
+    return recent_mean, slot_mean, count
+
+
+def _batch_lag_features(lag_index, lag_codes, targets, slot_history=None):
+    """
+    Vectorized get_lag_features for zone codes from lag_index['zone_index']
+    
+    With slot_history (training), the same-slot and zone-mean fallbacks are
+    taken as of each target, i.e. only from readings before it.
+    """
+    features = {}
+    lag_known = lag_codes >= 0
+    safe_lag_codes = np.where(lag_known, lag_codes, 0)
+    prefix = lag_index['prefix']
+    half_window = np.timedelta64(30, 'm')
+    
+    if slot_history is not None and len(lag_index['zone_mean']) > 0:
+        # Zone mean of the readings before each target
+        first, _ = _batch_window_bounds(lag_index, lag_codes, targets, targets)
+        zone_start = lag_index['offsets'][safe_lag_codes]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            zone_mean = (prefix[first] - prefix[zone_start]) / (first - zone_start)
+        zone_mean = np.where(first > zone_start, zone_mean, 0.5)
+    elif len(lag_index['zone_mean']) > 0:
+        zone_mean = lag_index['zone_mean'][safe_lag_codes]
+    
+    for name, lag in (('occupancy_1h_ago', np.timedelta64(1, 'h')),
+                      ('occupancy_24h_ago', np.timedelta64(24, 'h')),
+                      ('occupancy_7d_ago', np.timedelta64(7, 'D'))):
+        lagged = targets - lag
+        lo, hi = _batch_window_bounds(lag_index, lag_codes, lagged - half_window, lagged + half_window)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            window_mean = (prefix[hi] - prefix[lo]) / (hi - lo)
+        
+        if len(lag_index['zone_mean']) > 0:
+            lagged_stamps = pd.DatetimeIndex(lagged)
+            if slot_history is not None:
+                recent_mean, _, _ = _slot_stats_as_of(
+                    slot_history, lag_codes, lagged_stamps.weekday.values, lagged_stamps.hour.values, targets
+                )
+            else:
+                recent_mean = lag_index['recent_slot_mean'][
+                    safe_lag_codes, lagged_stamps.weekday.values, lagged_stamps.hour.values
+                ]
+            fallback = np.where(np.isnan(recent_mean), zone_mean, recent_mean)
+        else:
+            fallback = np.full(len(lag_codes), 0.5)
+        
+        features[name] = np.where(
+            ~lag_known, 0.5, np.where(hi > lo, window_mean, fallback)
+        )
+    
+    return features
+
+
+def _batch_pattern_trend(cube, cube_codes, weekday, hour):
+    """Same-weekday mean at this hour minus the previous hour (0 if either is missing)"""
+    if len(cube['zone_mean']) == 0:
+        return np.zeros(len(cube_codes))
+    
+    known = cube_codes >= 0
+    safe_codes = np.where(known, cube_codes, 0)
+    prev_hour = np.where(hour > 0, hour - 1, 23)
+    count = np.where(known, cube['count'][safe_codes, weekday, hour], 0)
+    prev_count = np.where(known, cube['count'][safe_codes, weekday, prev_hour], 0)
+    return np.where(
+        (count > 0) & (prev_count > 0),
+        cube['mean'][safe_codes, weekday, hour] - cube['mean'][safe_codes, weekday, prev_hour],
+        0.0
+    )
+
+
+def _batch_pattern_trend_as_of(slot_history, lag_codes, weekday, hour, targets):
+    """_batch_pattern_trend over only the readings before each target"""
+    prev_hour = np.where(hour > 0, hour - 1, 23)
+    _, mean, count = _slot_stats_as_of(slot_history, lag_codes, weekday, hour, targets)
+    _, prev_mean, prev_count = _slot_stats_as_of(slot_history, lag_codes, weekday, prev_hour, targets)
+    return np.where((count > 0) & (prev_count > 0), mean - prev_mean, 0.0)
+
+
+def _batch_event_features(zone_ids, stamps, event_index):
+    """Nearest same-day event for every row, one bisect pass per (zone, date)"""
+    has_event = np.zeros(len(zone_ids), dtype=np.float64)
+    hours_until_event = np.full(len(zone_ids), 99.0)
+    if not event_index or len(zone_ids) == 0:
+        return has_event, hours_until_event
+    
+    group_codes, groups = pd.MultiIndex.from_arrays([zone_ids, stamps.normalize()]).factorize()
+    targets = stamps.values
+    
+    for group, (zone_id, day) in enumerate(groups):
+        starts = event_index.get((zone_id, day.date()))
+        if not starts:
+            continue
+        
+        rows = np.flatnonzero(group_codes == group)
+        starts = np.array(starts, dtype='datetime64[ns]')
+        pos = np.searchsorted(starts, targets[rows], side='left')
+        before = starts[np.clip(pos - 1, 0, len(starts) - 1)]
+        after = starts[np.clip(pos, 0, len(starts) - 1)]
+        # Closest event, earlier one on a tie
+        nearest = np.where(
+            np.abs(targets[rows] - before) <= np.abs(after - targets[rows]), before, after
+        )
+        has_event[rows] = 1
+        hours_until_event[rows] = (nearest - targets[rows]) / np.timedelta64(1, 'h')
+    
+    return has_event, hours_until_event
+
+
+def extract_features_batch(zone_ids, datetimes, historical_df, events_df, cube=None, lag_index=None,
+                           event_index=None):
+    """
+    Extract all 15 features for many (zone, datetime) pairs at once
+    
+    Vectorized counterpart of extract_all_features, producing the same values
+    with array operations instead of per-row Python calls.
+    
+    Args:
+        zone_ids: Sequence of zone identifiers
+        datetimes: Sequence of target datetimes (same length as zone_ids)
+        historical_df: Historical parking data
+        events_df: Events dataframe
+        cube: Optional precomputed cube from build_historical_cube
+        lag_index: Optional precomputed index from build_lag_index
+        event_index: Optional precomputed index from build_event_index
+    
+    Returns:
+        float32 ndarray of shape (n, 15) in FEATURE_NAMES order
+    """
+    if cube is None:
+        cube = build_historical_cube(historical_df)
+    if lag_index is None:
+        lag_index = build_lag_index(historical_df)
+    if event_index is None:
+        event_index = build_event_index(events_df)
+    
+    zone_ids = np.asarray(zone_ids, dtype=object)
+    stamps = pd.DatetimeIndex(pd.to_datetime(datetimes)).as_unit('ns')
+    targets = stamps.values
+    features = {}
+    
+    # Temporal (5 features)
+    hour = stamps.hour.values
+    weekday = stamps.weekday.values
+    features['hour'] = hour
+    features['day_of_week'] = weekday
+    features['is_weekend'] = (weekday >= 5).astype(np.int64)
+    features['month'] = stamps.month.values
+    features['is_rush_hour'] = np.isin(hour, [7, 8, 17, 18]).astype(np.int64)
+    
+    # Historical (3 features)
+    cube_codes = pd.Index(list(cube['zone_index'])).get_indexer(zone_ids)
+    known = cube_codes >= 0
+    safe_codes = np.where(known, cube_codes, 0)
+    
+    if len(cube['zone_mean']) > 0:
+        count = np.where(known, cube['count'][safe_codes, weekday, hour], 0)
+        zone_mean = np.where(known, cube['zone_mean'][safe_codes], 0.5)
+        features['avg_same_hour'] = np.where(count > 0, cube['mean'][safe_codes, weekday, hour], zone_mean)
+        features['std_same_hour'] = np.where(count > 0, cube['std'][safe_codes, weekday, hour], 0.15)
+    else:
+        features['avg_same_hour'] = np.full(len(zone_ids), 0.5)
+        features['std_same_hour'] = np.full(len(zone_ids), 0.15)
+    
+    lag_codes = pd.Index(list(lag_index['zone_index'])).get_indexer(zone_ids)
+    recent_trend, has_recent = _batch_recent_trend(lag_index, lag_codes, targets)
+    features['trend_24h'] = np.where(
+        has_recent, recent_trend, _batch_pattern_trend(cube, cube_codes, weekday, hour)
+    )
+    
+    # Lag (3 features)
+    features.update(_batch_lag_features(lag_index, lag_codes, targets))
+    
+    # Event (2 features)
+    features['has_event'], features['hours_until_event'] = _batch_event_features(
+        zone_ids, stamps, event_index
+    )
+    
+    # Zone (2 features)
+    unique_zones, zone_codes = np.unique(zone_ids.astype(str), return_inverse=True)
+    zone_features = [get_zone_features(zone_id) for zone_id in unique_zones]
+    features['zone_type_encoded'] = np.array(
+        [f['zone_type_encoded'] for f in zone_features], dtype=np.int64
+    )[zone_codes] if len(zone_ids) > 0 else np.zeros(0)
+    features['total_capacity'] = np.array(
+        [f['total_capacity'] for f in zone_features], dtype=np.int64
+    )[zone_codes] if len(zone_ids) > 0 else np.zeros(0)
+    
+    return np.column_stack([features[key] for key in FEATURE_NAMES]).astype(np.float32)
+
+
+def create_training_dataset(historical_df, events_df, verbose=True):
     """
     Create full training dataset with features and targets - IMPROVED VERSION
     
     Args:
         historical_df: Historical parking data
         events_df: Events dataframe
+        verbose: Print progress for each step
     
     Returns:
         X (features), y (targets)
     """
-    print("Creating training dataset (SAFE & IMPROVED)...")
-    print(f"Total records: {len(historical_df)}")
+    log = print if verbose else (lambda *args: None)
+    
+    log("Creating training dataset (SAFE & IMPROVED)...")
+    log(f"Total records: {len(historical_df)}")
     
     # Make a copy to avoid modifying original
     df = historical_df.copy()
     
     # Pre-compute temporal features (vectorized - FAST!)
-    print("Computing temporal features...")
+    log("Computing temporal features...")
     df['hour'] = df['datetime'].dt.hour
     df['day_of_week'] = df['datetime'].dt.dayofweek
     df['is_weekend'] = (df['datetime'].dt.dayofweek >= 5).astype(int)
@@ -294,7 +741,7 @@ def create_training_dataset(historical_df, events_df):
     df['is_rush_hour'] = df['hour'].isin([7, 8, 17, 18]).astype(int)
     
     # Pre-compute zone features (vectorized properly)
-    print("Computing zone features...")
+    log("Computing zone features...")
     # Create lookup dictionaries once
     zone_type_map = {zone_id: ZONE_TYPE_ENCODING.get(meta.get('type', 'commercial'), 0) 
                      for zone_id, meta in ZONE_METADATA.items()}
@@ -305,7 +752,7 @@ def create_training_dataset(historical_df, events_df):
     df['total_capacity'] = df['blockface_id'].map(zone_capacity_map).fillna(20).astype(int)
     
     # IMPROVED: Historical features grouped by zone + hour + day_of_week
-    print("Computing historical averages (improved)...")
+    log("Computing historical averages (improved)...")
     zone_hour_day_avg = df.groupby(['blockface_id', 'hour', 'day_of_week'])['occupancy_rate'].agg(['mean', 'std']).reset_index()
     zone_hour_day_avg.columns = ['blockface_id', 'hour', 'day_of_week', 'avg_same_hour', 'std_same_hour']
     zone_hour_day_avg['std_same_hour'] = zone_hour_day_avg['std_same_hour'].fillna(0.15)
@@ -314,41 +761,57 @@ def create_training_dataset(historical_df, events_df):
     df['avg_same_hour'] = df['avg_same_hour'].fillna(0.5)
     df['std_same_hour'] = df['std_same_hour'].fillna(0.15)
     
-    # SAFE: Lag features using zone averages (NO DATA LEAKAGE)
-    # This is intentionally simplified to avoid overfitting
-    print("Computing lag features (safe - using zone averages)...")
-    zone_avg = df.groupby('blockface_id')['occupancy_rate'].mean()
-    df['occupancy_1h_ago'] = df['blockface_id'].map(zone_avg)
-    df['occupancy_24h_ago'] = df['blockface_id'].map(zone_avg)
-    df['occupancy_7d_ago'] = df['blockface_id'].map(zone_avg)
-    df['trend_24h'] = 0.0  # Simplified to avoid data leakage
-    
-    # Event features (vectorized)
-    print("Computing event features...")
+    # SAFE: Lag features from the same per-zone time index used at serving
+    # time. Every window ends before the record's own timestamp (at most
+    # t - 30min), and the same-slot, zone-mean and pattern-trend fallbacks
+    # only use readings strictly before it - what serving would have seen.
+    log("Computing lag features (per-zone time index)...")
+    lag_index = build_lag_index(df)
+    slot_history = build_slot_history(lag_index)
+    lag_codes = pd.Index(list(lag_index['zone_index'])).get_indexer(df['blockface_id'])
+    targets = df['datetime'].values.astype('datetime64[ns]')
+    for name, values in _batch_lag_features(lag_index, lag_codes, targets, slot_history).items():
+        df[name] = values
+    
+    recent_trend, has_recent = _batch_recent_trend(lag_index, lag_codes, targets)
+    df['trend_24h'] = np.where(
+        has_recent,
+        recent_trend,
+        _batch_pattern_trend_as_of(
+            slot_history, lag_codes, df['day_of_week'].values, df['hour'].values, targets
+        )
+    )
+    
+    # Event features (vectorized): join each record to the events on its
+    # zone and date in one pass, then keep the nearest event per record
+    log("Computing event features...")
     df['has_event'] = 0
     df['hours_until_event'] = 99.0
     
-    # For each event, mark affected zones
-    for _, event in events_df.iterrows():
-        event_date = pd.to_datetime(event['date'])
-        event_time = pd.to_datetime(f"{event['date']} {event['start_time']}")
-        nearby_zones = event['nearby_zones']
-        
-        # Find records on same day and in nearby zones
-        mask = (
-            (df['datetime'].dt.date == event_date.date()) &
-            (df['blockface_id'].isin(nearby_zones))
+    events = explode_events(events_df)
+    if len(events) > 0:
+        records = pd.DataFrame({
+            'row': np.arange(len(df)),
+            'blockface_id': df['blockface_id'].astype(str).values,
+            'event_date': df['datetime'].dt.normalize().values.astype('datetime64[ns]'),
+            'datetime': df['datetime'].values.astype('datetime64[ns]')
+        })
+        matches = records.merge(events, on=['blockface_id', 'event_date'], how='inner')
+        matches['hours_until_event'] = (
+            (matches['event_start'] - matches['datetime']).dt.total_seconds() / 3600
         )
+        matches['distance'] = matches['hours_until_event'].abs()
+        # Deterministic: closest event first, earlier event on a tie
+        nearest = matches.sort_values(
+            ['row', 'distance', 'event_start'], kind='mergesort'
+        ).drop_duplicates('row')
         
-        if mask.any():
-            df.loc[mask, 'has_event'] = 1
-            # Calculate hours until event for these records
-            hours_diff = (event_time - df.loc[mask, 'datetime']).dt.total_seconds() / 3600
-            # Simple: just use the first event found (or could use min/max logic)
-            df.loc[mask, 'hours_until_event'] = hours_diff
+        rows = nearest['row'].values
+        df.iloc[rows, df.columns.get_loc('has_event')] = 1
+        df.iloc[rows, df.columns.get_loc('hours_until_event')] = nearest['hours_until_event'].values
     
     # Extract features in correct order
-    print("Assembling feature matrix...")
+    log("Assembling feature matrix...")
     feature_columns = [
         'hour', 'day_of_week', 'is_weekend', 'month', 'is_rush_hour',
         'avg_same_hour', 'std_same_hour', 'trend_24h',
@@ -360,5 +823,5 @@ def create_training_dataset(historical_df, events_df):
     X = df[feature_columns].values
     y = df['occupancy_rate'].values
     
-    print(f"✅ Created {len(X)} training samples (safe, no data leakage)!")
+    log(f"✅ Created {len(X)} training samples (safe, no data leakage)!")
     return X, y
@@ -0,0 +1,326 @@
+"""
+Flattened random forest inference engine
+
+Stores every tree of a fitted RandomForestRegressor as slices of shared
+node arrays and traverses all trees for a whole batch at once with numpy.
+"""
+import os
+import json
+import hashlib
+import numpy as np
+
+
+# sklearn marks leaves with left == right == -1
+TREE_LEAF = -1
+
+
+def model_fingerprint(model_file, trained_at=None):
+    """
+    Identify the pickled model a flat forest was exported from
+
+    Args:
+        model_file: Path to the pickled sklearn model
+        trained_at: Optional training timestamp from the model metadata
+
+    Returns:
+        dict with size, mtime_ns, sha256 and trained_at
+    """
+    digest = hashlib.sha256()
+    with open(model_file, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    stat = os.stat(model_file)
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': digest.hexdigest(),
+        'trained_at': trained_at
+    }
+
+
+def forest_matches_model(path, model_file, trained_at=None):
+    """
+    Check that a saved forest was exported from model_file
+
+    Size and mtime are compared first; the file is only hashed when the
+    mtime differs (e.g. after a plain copy or a checkout).
+
+    Args:
+        path: Directory written by FlatForest.save()
+        model_file: Path to the pickled sklearn model
+        trained_at: Optional training timestamp the model should have
+
+    Returns:
+        True if the forest's recorded source matches model_file
+    """
+    with open(os.path.join(path, 'forest.json'), 'r') as f:
+        source = json.load(f).get('source')
+    if not source:
+        return False
+    if trained_at and source.get('trained_at') and source['trained_at'] != trained_at:
+        return False
+
+    stat = os.stat(model_file)
+    if stat.st_size != source.get('size'):
+        return False
+    if stat.st_mtime_ns == source.get('mtime_ns'):
+        return True
+    return model_fingerprint(model_file)['sha256'] == source.get('sha256')
+
+
+class FlatForest:
+    """
+    Random forest as flat node arrays
+
+    Node i of the concatenated arrays splits on feature[i] at threshold[i]
+    and continues to left[i] / right[i] (global node ids, -1 for leaves);
+    value[i] is the leaf prediction. roots[t] is the root node of tree t.
+    """
+
+    ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'missing_left', 'roots')
+    TREE_BLOCK = 25
+
+    def __init__(self, feature, threshold, left, right, value, missing_left, roots, max_depth,
+                 children=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.missing_left = missing_left
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        # NaN inputs follow missing_left only in trees fitted with missing values
+        self.has_missing = bool(missing_left.any())
+        self._children_cache = children
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.ARRAYS)
+
+    @property
+    def is_mapped(self):
+        """True if the node arrays are memory-mapped from disk"""
+        return isinstance(self.threshold, np.memmap)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """
+        Flatten a fitted sklearn RandomForestRegressor (single output)
+
+        Args:
+            model: Fitted RandomForestRegressor
+
+        Returns:
+            FlatForest
+        """
+        features, thresholds, lefts, rights, values, missing, roots = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            nodes = tree.__getstate__()['nodes']
+            is_leaf = tree.children_left == TREE_LEAF
+
+            # Leaves keep a valid feature index so batched gathers never go out of range
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(np.where(is_leaf, TREE_LEAF, tree.children_left + offset).astype(np.int32))
+            rights.append(np.where(is_leaf, TREE_LEAF, tree.children_right + offset).astype(np.int32))
+            values.append(tree.value.reshape(tree.node_count, -1)[:, 0].astype(np.float64))
+            if 'missing_go_to_left' in nodes.dtype.names:
+                missing.append(nodes['missing_go_to_left'].astype(bool))
+            else:
+                missing.append(np.zeros(tree.node_count, dtype=bool))
+            roots.append(offset)
+
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            np.concatenate(features),
+            np.concatenate(thresholds),
+            np.concatenate(lefts),
+            np.concatenate(rights),
+            np.concatenate(values),
+            np.concatenate(missing),
+            np.array(roots, dtype=np.int32),
+            max_depth
+        )
+
+    def save(self, path, source=None):
+        """
+        Write the forest as a directory of uncompressed .npy files
+
+        Each array can then be memory-mapped by load(), so processes serving
+        the same artifact share its pages instead of holding private copies.
+
+        Args:
+            path: Output directory (created if missing)
+            source: Optional model_fingerprint() of the pickle the forest came from
+        """
+        os.makedirs(path, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(getattr(self, name)))
+        np.save(os.path.join(path, 'children.npy'), self._children())
+        with open(os.path.join(path, 'forest.json'), 'w') as f:
+            json.dump({
+                'max_depth': self.max_depth,
+                'n_trees': self.n_trees,
+                'n_nodes': len(self.value),
+                'dtype': str(self.threshold.dtype),
+                'source': source
+            }, f, indent=2)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """
+        Load a forest written by save()
+
+        Args:
+            path: Directory written by save()
+            mmap_mode: numpy mmap mode, or None to read arrays into memory
+
+        Returns:
+            FlatForest
+        """
+        with open(os.path.join(path, 'forest.json'), 'r') as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in cls.ARRAYS + ('children',)
+        }
+        return cls(max_depth=meta['max_depth'], **arrays)
+
+    def to_float32(self):
+        """
+        Copy of the forest with float32 thresholds and leaf values
+
+        Thresholds are rounded down to the nearest float32, so for float32
+        inputs every split decision is identical to the float64 forest; only
+        leaf values lose precision (~1e-7).
+
+        Returns:
+            FlatForest
+        """
+        threshold = self.threshold.astype(np.float32)
+        rounded_up = threshold.astype(np.float64) > self.threshold
+        threshold[rounded_up] = np.nextafter(threshold[rounded_up], np.float32(-np.inf))
+        return FlatForest(
+            self.feature, threshold, self.left, self.right, self.value.astype(np.float32),
+            self.missing_left, self.roots, self.max_depth, children=self._children_cache
+        )
+
+    def subset(self, n_trees):
+        """
+        Forest made of the first n_trees trees
+
+        Args:
+            n_trees: Number of trees to keep
+
+        Returns:
+            FlatForest
+        """
+        if n_trees >= self.n_trees:
+            return self
+        end = int(self.roots[n_trees])
+        return FlatForest(
+            self.feature[:end], self.threshold[:end], self.left[:end], self.right[:end],
+            self.value[:end], self.missing_left[:end], self.roots[:n_trees], self.max_depth
+        )
+
+    def _children(self):
+        """(n_nodes * 2,) array: [left, right] per node, leaves point at themselves"""
+        if self._children_cache is None:
+            node_ids = np.arange(len(self.left), dtype=np.int32)
+            is_leaf = self.left == TREE_LEAF
+            children = np.empty((len(self.left), 2), dtype=np.int32)
+            children[:, 0] = np.where(is_leaf, node_ids, self.left)
+            children[:, 1] = np.where(is_leaf, node_ids, self.right)
+            self._children_cache = children.ravel()
+        return self._children_cache
+
+    def apply(self, X):
+        """
+        Leaf node reached in every tree for every row
+
+        Args:
+            X: Array-like of shape (n, n_features)
+
+        Returns:
+            int array of shape (n_trees, n) with global leaf node ids
+        """
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        children = self._children()
+        flat_X = X.ravel()
+        leaves = np.empty((self.n_trees, n_rows), dtype=np.int32)
+
+        # Traverse a block of trees at a time so their nodes stay in cache
+        for start in range(0, self.n_trees, self.TREE_BLOCK):
+            roots = self.roots[start:start + self.TREE_BLOCK]
+            row_offsets = np.tile(np.arange(n_rows, dtype=np.int64) * n_features, len(roots))
+            nodes = np.repeat(roots, n_rows)
+
+            # Leaves loop back to themselves, so max_depth steps reach every leaf
+            for _ in range(self.max_depth):
+                x = flat_X[row_offsets + self.feature[nodes]]
+                go_right = ~(x <= self.threshold[nodes])
+                if self.has_missing:
+                    go_right &= ~(np.isnan(x) & self.missing_left[nodes])
+                nodes = children[2 * nodes + go_right]
+
+            leaves[start:start + len(roots)] = nodes.reshape(len(roots), n_rows)
+
+        return leaves
+
+    def _tree_values(self, X):
+        """(n_trees, n) matrix of every tree's prediction from one traversal"""
+        return self.value[self.apply(X)]
+
+    def _mean(self, tree_values):
+        """Sum trees one at a time then divide, the same accumulation sklearn uses"""
+        total = np.zeros(tree_values.shape[1], dtype=np.float64)
+        for values in tree_values:
+            total += values
+        return total / self.n_trees
+
+    def predict(self, X):
+        """
+        Mean prediction over all trees, matching RandomForestRegressor.predict
+
+        Args:
+            X: Array-like of shape (n, n_features)
+
+        Returns:
+            float64 array of shape (n,)
+        """
+        return self._mean(self._tree_values(X))
+
+    def predict_distribution(self, X, quantiles=(0.1, 0.9)):
+        """
+        Mean, spread and quantile interval of the per-tree predictions
+
+        All statistics come from the same single traversal as predict().
+
+        Args:
+            X: Array-like of shape (n, n_features)
+            quantiles: (lower, upper) quantiles of the tree predictions
+
+        Returns:
+            dict of float64 arrays of shape (n,): mean, std, lower, upper
+        """
+        tree_values = self._tree_values(X)
+        lower, upper = np.quantile(tree_values, quantiles, axis=0)
+        return {
+            'mean': self._mean(tree_values),
+            'std': tree_values.std(axis=0),
+            'lower': lower,
+            'upper': upper
+        }
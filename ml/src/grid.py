@@ -0,0 +1,126 @@
+"""
+Precomputed weekly prediction grid
+
+For event-free targets far enough from the loaded history that no lag window
+overlaps it, every feature depends only on (zone, month, weekday, hour). The
+grid stores the model's output for all of those slots so recurring requests
+are answered with an array lookup instead of feature extraction and
+inference.
+
+Artifact (next to parking_model.pkl):
+    parking_model_grid.npy   float32 (zones, 12 months, 7 days, 24 hours, 4 stats)
+    parking_model_grid.json  zones, stats, history signature and valid range
+"""
+import os
+import json
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+
+
+GRID_STATS = ('occupancy_rate', 'occupancy_std', 'occupancy_lower', 'occupancy_upper')
+GRID_NDIM = 5
+
+# Lag features look back up to 7 days with a +/-30 minute window
+LAG_HORIZON = timedelta(days=7, minutes=30)
+
+
+def grid_artifact_paths(model_file):
+    """(array path, metadata path) of the grid saved next to parking_model.pkl"""
+    base = os.path.splitext(model_file)[0] + '_grid'
+    return base + '.npy', base + '.json'
+
+
+def history_signature(historical_df):
+    """Row count and time range identifying the history a grid was built from"""
+    times = historical_df['datetime']
+    return {
+        'rows': int(len(historical_df)),
+        'first': pd.Timestamp(times.min()).isoformat(),
+        'last': pd.Timestamp(times.max()).isoformat()
+    }
+
+
+def grid_week_start(historical_df):
+    """Monday 00:00 of the first week whose every hour is outside all lag windows"""
+    last = pd.Timestamp(historical_df['datetime'].max())
+    start = (last + LAG_HORIZON + timedelta(days=1)).normalize()
+    return start + timedelta(days=(7 - start.weekday()) % 7)
+
+
+def save_prediction_grid(grid, metadata, model_file):
+    """
+    Write the grid array (uncompressed, so it can be memory-mapped) and its metadata
+
+    Args:
+        grid: float32 array (zones, 12, 7, 24, len(GRID_STATS))
+        metadata: dict with at least 'zones' and 'history'
+        model_file: Path of the parking_model.pkl the grid belongs to
+    """
+    array_path, metadata_path = grid_artifact_paths(model_file)
+    np.save(array_path, np.ascontiguousarray(grid, dtype=np.float32))
+    with open(metadata_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    print(f"Prediction grid saved: {array_path} ({grid.nbytes / (1024 * 1024):.2f} MB)")
+
+
+def load_prediction_grid(model_file, historical_df):
+    """
+    Memory-map the grid saved next to model_file
+
+    The grid is only valid for the history it was built from, so it is
+    ignored when the loaded history differs (e.g. newer data or a
+    history_weeks limit).
+
+    Args:
+        model_file: Path of parking_model.pkl
+        historical_df: History the serving runtime loaded
+
+    Returns:
+        dict with values, zone_index, valid_before, valid_after; or None
+    """
+    array_path, metadata_path = grid_artifact_paths(model_file)
+    if not (os.path.exists(array_path) and os.path.exists(metadata_path)):
+        return None
+
+    with open(metadata_path, 'r') as f:
+        metadata = json.load(f)
+    if len(metadata.get('shape', ())) != GRID_NDIM:
+        print(f"⚠️  Prediction grid {array_path} has an old layout; not using it")
+        return None
+    if metadata.get('history') != history_signature(historical_df):
+        print(f"⚠️  Prediction grid {array_path} was built from different history; not using it")
+        return None
+
+    history = metadata['history']
+    return {
+        'values': np.load(array_path, mmap_mode='r'),
+        'zone_index': {zone_id: i for i, zone_id in enumerate(metadata['zones'])},
+        # Before the first reading or beyond the lag horizon, no window overlaps the history
+        'valid_before': pd.Timestamp(history['first']),
+        'valid_after': pd.Timestamp(history['last']) + LAG_HORIZON
+    }
+
+
+def grid_lookup(grid, zone_id, target_dt):
+    """
+    Precomputed event-free prediction for a slot, if the grid covers it
+
+    Args:
+        grid: dict returned by load_prediction_grid
+        zone_id: Zone identifier
+        target_dt: Target datetime
+
+    Returns:
+        dict of GRID_STATS -> float, or None if the zone or time is not covered
+    """
+    zone_idx = grid['zone_index'].get(zone_id)
+    if zone_idx is None:
+        return None
+
+    target = pd.Timestamp(target_dt)
+    if grid['valid_before'] < target <= grid['valid_after']:
+        return None
+
+    values = grid['values'][zone_idx, target.month - 1, target.weekday(), target.hour]
+    return {stat: float(value) for stat, value in zip(GRID_STATS, values)}
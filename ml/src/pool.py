@@ -0,0 +1,152 @@
+"""
+Process pool for batch inference over shared, memory-mapped model and history
+
+The parent exports the runtime's forest and index arrays as uncompressed
+.npy files once; every worker memory-maps the same files, so the page cache
+holds a single copy no matter how many workers run. Only the small event
+index is sent to each worker.
+"""
+import os
+import json
+import shutil
+import tempfile
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from forest import FlatForest
+from predict import score_batch
+
+
+# Index arrays each worker maps; dict-valued entries are rebuilt from zone lists
+SHARED_INDEXES = ('historical_cube', 'lag_index')
+
+# Worker-side runtime, set by _attach in each worker process
+_WORKER_RUNTIME = None
+
+
+def export_runtime_arrays(runtime, out_dir):
+    """
+    Write a runtime's forest and index arrays as memory-mappable files
+
+    Args:
+        runtime: Runtime snapshot from predict.load_model
+        out_dir: Directory to write into (created if missing)
+
+    Returns:
+        Path of the forest directory to map (the runtime's own artifact if
+        it was loaded from one)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    meta = {}
+    for name in SHARED_INDEXES:
+        index = runtime[name]
+        meta[name] = {'zones': list(index['zone_index']), 'arrays': []}
+        for key, value in index.items():
+            if isinstance(value, np.ndarray):
+                np.save(os.path.join(out_dir, f"{name}.{key}.npy"), value)
+                meta[name]['arrays'].append(key)
+    with open(os.path.join(out_dir, 'runtime.json'), 'w') as f:
+        json.dump(meta, f)
+
+    forest = runtime['forest']
+    if forest.is_mapped:
+        return os.path.dirname(forest.threshold.filename)
+    forest_dir = os.path.join(out_dir, 'forest')
+    forest.save(forest_dir)
+    return forest_dir
+
+
+def attach_runtime_arrays(arrays_dir, forest_dir, event_index):
+    """
+    Map arrays written by export_runtime_arrays into a scoring runtime
+
+    Args:
+        arrays_dir: Directory passed to export_runtime_arrays
+        forest_dir: Forest directory returned by export_runtime_arrays
+        event_index: Event index of the exported runtime
+
+    Returns:
+        dict usable with predict.score_batch
+    """
+    with open(os.path.join(arrays_dir, 'runtime.json'), 'r') as f:
+        meta = json.load(f)
+
+    runtime = {'forest': FlatForest.load(forest_dir, mmap_mode='r'), 'event_index': event_index}
+    for name in SHARED_INDEXES:
+        index = {'zone_index': {zone_id: i for i, zone_id in enumerate(meta[name]['zones'])}}
+        for key in meta[name]['arrays']:
+            index[key] = np.load(os.path.join(arrays_dir, f"{name}.{key}.npy"), mmap_mode='r')
+        runtime[name] = index
+    return runtime
+
+
+def _attach(arrays_dir, forest_dir, event_index):
+    """Worker initializer"""
+    global _WORKER_RUNTIME
+    _WORKER_RUNTIME = attach_runtime_arrays(arrays_dir, forest_dir, event_index)
+
+
+def _score_chunk(zone_ids, target_datetimes):
+    """Worker task: score one chunk of rows"""
+    return score_batch(_WORKER_RUNTIME, zone_ids, target_datetimes)
+
+
+class InferencePool:
+    """
+    Worker processes scoring batches against one runtime snapshot
+
+    Rebuild the pool after a reload; predict_occupancy_batch only uses a pool
+    whose data_version matches the active runtime.
+    """
+
+    def __init__(self, runtime, workers, shared_dir=None, min_chunk=64):
+        """
+        Args:
+            runtime: Runtime snapshot from predict.load_model
+            workers: Number of worker processes
+            shared_dir: Directory for exported arrays (default: a temp directory)
+            min_chunk: Rows below which a batch is not split across workers
+        """
+        self.workers = workers
+        self.min_chunk = min_chunk
+        self.data_version = runtime['data_version']
+        self._owns_dir = shared_dir is None
+        self.shared_dir = shared_dir or tempfile.mkdtemp(prefix='findr-runtime-')
+
+        forest_dir = export_runtime_arrays(runtime, self.shared_dir)
+        # spawn: workers start clean and attach to the mapped files instead of
+        # inheriting the parent's heap
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_attach,
+            initargs=(self.shared_dir, forest_dir, dict(runtime['event_index']))
+        )
+
+    def score(self, zone_ids, target_datetimes):
+        """
+        Score rows across the workers
+
+        Args:
+            zone_ids: Zone identifiers
+            target_datetimes: Target datetimes (same length as zone_ids)
+
+        Returns:
+            dict of arrays as returned by predict.score_batch, in input order
+        """
+        n = len(zone_ids)
+        n_chunks = max(1, min(self.workers, n // self.min_chunk))
+        bounds = np.linspace(0, n, n_chunks + 1).astype(int)
+        futures = [
+            self._executor.submit(_score_chunk, list(zone_ids[lo:hi]), list(target_datetimes[lo:hi]))
+            for lo, hi in zip(bounds[:-1], bounds[1:])
+        ]
+        parts = [future.result() for future in futures]
+        return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+    def close(self):
+        """Stop the workers and remove exported arrays this pool created"""
+        self._executor.shutdown(wait=True)
+        if self._owns_dir:
+            shutil.rmtree(self.shared_dir, ignore_errors=True)
@@ -2,50 +2,479 @@
 Make predictions using trained model
 """
 import os
+import sys
 import json
+import time
+import itertools
+import threading
+from types import MappingProxyType
 import joblib
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 
-from config import MODEL_PATH, ZONE_METADATA
-from features import extract_all_features
+from config import (
+    MODEL_PATH, ZONE_METADATA, FEATURE_NAMES,
+    FEATURE_CACHE_SIZE, FEATURE_CACHE_TTL_SECONDS, PREDICTION_QUANTILES
+)
+from cache import TTLCache
+from forest import FlatForest, forest_matches_model
+from features import (
+    extract_all_features, extract_features_batch,
+    build_historical_cube, build_lag_index, build_event_index
+)
+from storage import load_parking_history, compact_historical_df, compact_events_df
+from registry import resolve_model_path, read_metadata
+from grid import (
+    GRID_STATS, history_signature, grid_week_start,
+    load_prediction_grid, grid_lookup
+)
 
 
-# Load model once (global)
-MODEL = None
-HISTORICAL_DF = None
-EVENTS_DF = None
+# ModelRuntime serving predictions. Requests take one snapshot from it, so an
+# in-flight request keeps using the data it started with while reload_model
+# swaps in a new runtime.
+ACTIVE_RUNTIME = None
+_ACTIVE_LOCK = threading.Lock()
+_RELOAD_LOCK = threading.Lock()
 
+# Each built runtime gets a new data_version; it is part of every cache key
+_DATA_VERSIONS = itertools.count(1)
+FEATURE_CACHE = TTLCache(maxsize=FEATURE_CACHE_SIZE, ttl_seconds=FEATURE_CACHE_TTL_SECONDS)
 
-def load_model(model_path=None, data_dir=None):
-    """Load trained model and data.
+
+def forest_artifact_path(model_file):
+    """Directory of the flat forest artifact saved next to parking_model.pkl"""
+    return os.path.splitext(model_file)[0] + '_forest'
+
+
+def _resolve_paths(model_path=None, data_dir=None, version=None, registry_dir=None):
+    """
+    Pick the model file and data directory to load
+    
+    An explicit version comes from the registry; otherwise model_path wins,
+    then the registry's active version, then ml/models/parking_model.pkl.
+    
+    Returns:
+        (version, model_file, data_dir)
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    ml_dir = os.path.dirname(script_dir)
+    
+    if version is not None or model_path is None:
+        version, registry_model = resolve_model_path(version, registry_dir)
+        model_path = registry_model or model_path
+    
+    model_file = model_path or os.path.join(ml_dir, 'models', 'parking_model.pkl')
+    data_path = data_dir or os.path.join(ml_dir, 'data', 'processed')
+    return version, model_file, data_path
+
+
+def build_runtime(model_path=None, data_dir=None, history_weeks=None, version=None, registry_dir=None):
+    """
+    Load a model and its data into a new read-only snapshot
     
     Args:
-        model_path: Optional path to parking_model.pkl. If None, uses ml/models/.
-        data_dir: Optional directory containing parking_data.json and events.json. If None, uses ml/data/processed/.
+        model_path: Optional path to parking_model.pkl. If None, uses the
+            registry's active version, else ml/models/. A parking_model_forest/
+            artifact next to it is memory-mapped instead of unpickling the
+            sklearn model, as long as it was exported from this pickle.
+        data_dir: Optional directory containing parking_data.json (or a converted
+            parking_history/ Parquet dataset) and events.json. If None, uses ml/data/processed/.
+        history_weeks: Optional number of weeks of history to load, counted back
+            from the newest reading.
+        version: Optional registry version to load instead of model_path.
+        registry_dir: Optional registry directory (default: ml/models/registry).
+    
+    Returns:
+        Read-only mapping (see ModelRuntime)
     """
-    global MODEL, HISTORICAL_DF, EVENTS_DF
+    started = time.perf_counter()
+    version, model_file, data_path = _resolve_paths(model_path, data_dir, version, registry_dir)
+    forest_dir = forest_artifact_path(model_file)
+    metadata = read_metadata(version, registry_dir) if version else {}
     
-    if MODEL is None:
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        ml_dir = os.path.dirname(script_dir)
-        
-        model_file = model_path or os.path.join(ml_dir, 'models', 'parking_model.pkl')
-        data_path = data_dir or os.path.join(ml_dir, 'data', 'processed')
-        
-        if not os.path.exists(model_file):
-            raise FileNotFoundError(f"Model file not found: {model_file}")
-        
-        MODEL = joblib.load(model_file)
+    use_forest = os.path.isdir(forest_dir)
+    if use_forest and os.path.exists(model_file):
+        use_forest = forest_matches_model(forest_dir, model_file, metadata.get('trained_at'))
+        if not use_forest:
+            print(f"⚠️  {forest_dir} was not exported from {model_file}; loading the pickle")
+    
+    model = None
+    if use_forest:
+        # Memory-mapped float32 artifact written by train.py: nothing to
+        # unpickle, and workers share the mapped pages
+        forest = FlatForest.load(forest_dir, mmap_mode='r')
+    elif os.path.exists(model_file):
+        model = joblib.load(model_file)
+        # Single-row calls should not pay joblib dispatch for n_jobs=-1
+        model.n_jobs = 1
+        forest = FlatForest.from_sklearn(model)
+    else:
+        raise FileNotFoundError(f"Model file not found: {model_file}")
+    
+    historical_df = compact_historical_df(
+        load_parking_history(data_path, weeks=history_weeks)
+    )
+    
+    events_path = os.path.join(data_path, 'events.json')
+    with open(events_path, 'r') as f:
+        events_data = json.load(f)
+    events_df = compact_events_df(pd.DataFrame(events_data))
+    
+    runtime = {
+        'version': version,
+        'model_file': model_file,
+        'data_dir': data_path,
+        'metadata': metadata,
+        'model': model,
+        'forest': forest,
+        'historical_df': historical_df,
+        'historical_cube': build_historical_cube(historical_df),
+        'lag_index': build_lag_index(historical_df),
+        'events_df': events_df,
+        'event_index': build_event_index(events_df),
+        'grid': load_prediction_grid(model_file, historical_df),
+        'data_version': next(_DATA_VERSIONS),
+        'loaded_at': datetime.now().isoformat()
+    }
+    
+    warm_up(runtime)
+    runtime['load_seconds'] = round(time.perf_counter() - started, 3)
+    return _freeze(runtime)
+
+
+def _freeze(runtime):
+    """Make a runtime dict read-only: a mapping proxy over read-only index arrays"""
+    for name in ('historical_cube', 'lag_index'):
+        for value in runtime[name].values():
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+    return MappingProxyType(runtime)
+
+
+class ModelRuntime:
+    """
+    One model version with its history, events and indexes
+    
+    The data is loaded exactly once, on the first snapshot() call, behind a
+    lock, so concurrent first requests share a single load. Snapshots are
+    read-only mappings that never change after loading; several runtimes
+    (e.g. the old and new version during a reload) can exist side by side.
+    """
+    
+    def __init__(self, model_path=None, data_dir=None, history_weeks=None, version=None, registry_dir=None):
+        """
+        Args:
+            model_path, data_dir, history_weeks, version, registry_dir: see build_runtime
+        """
+        self.model_path = model_path
+        self.data_dir = data_dir
+        self.history_weeks = history_weeks
+        self.version = version
+        self.registry_dir = registry_dir
+        self._lock = threading.Lock()
+        self._snapshot = None
+    
+    @property
+    def loaded(self):
+        return self._snapshot is not None
+    
+    def peek(self):
+        """The snapshot if already loaded, else None (never loads)"""
+        return self._snapshot
+    
+    def snapshot(self):
+        """
+        Loaded model and data, loading them on first use
         
-        parking_path = os.path.join(data_path, 'parking_data.json')
-        HISTORICAL_DF = pd.read_json(parking_path)
-        HISTORICAL_DF['datetime'] = pd.to_datetime(HISTORICAL_DF['datetime'])
+        Returns:
+            Read-only mapping with forest, historical_df, lag_index, event_index, etc.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                # Another thread may have finished loading while we waited
+                if self._snapshot is None:
+                    self._snapshot = build_runtime(
+                        self.model_path, self.data_dir, self.history_weeks,
+                        self.version, self.registry_dir
+                    )
+                snapshot = self._snapshot
+        return snapshot
+
+
+def warm_up(runtime):
+    """Run one prediction per zone so mapped pages and lazy caches are hot before serving"""
+    zone_ids = list(ZONE_METADATA)
+    if not zone_ids:
+        return
+    now = datetime.now()
+    features = extract_features_batch(
+        zone_ids,
+        [now] * len(zone_ids),
+        runtime['historical_df'],
+        runtime['events_df'],
+        cube=runtime['historical_cube'],
+        lag_index=runtime['lag_index'],
+        event_index=runtime['event_index']
+    )
+    _score(runtime, features)
+
+
+def load_model(model_path=None, data_dir=None, history_weeks=None, version=None, registry_dir=None):
+    """Load trained model and data once.
+    
+    The first call creates the active ModelRuntime; later calls (from any
+    thread) return its snapshot without loading again.
+    
+    Args:
+        model_path: Optional path to parking_model.pkl. If None, uses the
+            registry's active version, else ml/models/.
+        data_dir: Optional directory containing parking_data.json (or a converted
+            parking_history/ Parquet dataset) and events.json. If None, uses ml/data/processed/.
+        history_weeks: Optional number of weeks of history to load, counted back
+            from the newest reading.
+        version: Optional registry version to load instead of model_path.
+        registry_dir: Optional registry directory (default: ml/models/registry).
+    
+    Returns:
+        Snapshot of the active runtime
+    """
+    global ACTIVE_RUNTIME
+    
+    runtime = ACTIVE_RUNTIME
+    if runtime is None:
+        with _ACTIVE_LOCK:
+            if ACTIVE_RUNTIME is None:
+                ACTIVE_RUNTIME = ModelRuntime(model_path, data_dir, history_weeks, version, registry_dir)
+            runtime = ACTIVE_RUNTIME
+    return runtime.snapshot()
+
+
+def reload_model(model_path=None, data_dir=None, history_weeks=None, version=None, registry_dir=None):
+    """
+    Load a new model and data, warm them up, then swap them in atomically
+    
+    The new ModelRuntime loads alongside the active one. Requests already
+    running keep the snapshot they started with; new requests see the new
+    runtime as soon as the reference is replaced. If loading fails the
+    current runtime stays active. Concurrent reloads run one at a time.
+    
+    Args:
+        model_path: Optional path to parking_model.pkl
+        data_dir: Optional data directory (default: the active runtime's)
+        history_weeks: Optional number of most recent weeks of history to load
+        version: Optional registry version (default: active version)
+        registry_dir: Optional registry directory (default: ml/models/registry)
+    
+    Returns:
+        dict describing the new runtime (see runtime_info)
+    """
+    global ACTIVE_RUNTIME
+    
+    with _RELOAD_LOCK:
+        current = active_snapshot()
+        if data_dir is None and current is not None:
+            data_dir = current['data_dir']
         
-        events_path = os.path.join(data_path, 'events.json')
-        with open(events_path, 'r') as f:
-            events_data = json.load(f)
-        EVENTS_DF = pd.DataFrame(events_data)
+        runtime = ModelRuntime(model_path, data_dir, history_weeks, version, registry_dir)
+        snapshot = runtime.snapshot()
+        with _ACTIVE_LOCK:
+            ACTIVE_RUNTIME = runtime
+    
+    # Entries keyed by the old data_version can no longer be hit
+    FEATURE_CACHE.clear()
+    return runtime_info(snapshot)
+
+
+def active_snapshot():
+    """Snapshot of the active runtime, or None if nothing is loaded yet"""
+    runtime = ACTIVE_RUNTIME
+    return runtime.peek() if runtime is not None else None
+
+
+def runtime_info(runtime=None):
+    """Version and load details of a runtime snapshot (default: the active one)"""
+    runtime = runtime or active_snapshot()
+    if runtime is None:
+        return {}
+    return {
+        'version': runtime['version'],
+        'model_file': runtime['model_file'],
+        'data_dir': runtime['data_dir'],
+        'n_trees': runtime['forest'].n_trees,
+        'prediction_grid': runtime['grid'] is not None,
+        'trained_at': runtime['metadata'].get('trained_at'),
+        'loaded_at': runtime['loaded_at'],
+        'load_seconds': runtime.get('load_seconds')
+    }
+
+
+def active_version():
+    """Registry version of the active runtime (None if loaded outside the registry)"""
+    runtime = active_snapshot()
+    return runtime['version'] if runtime is not None else None
+
+
+def _nbytes(obj):
+    """Approximate in-memory size of loaded data structures"""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sum(_nbytes(key) + _nbytes(value) for key, value in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return sum(_nbytes(item) for item in obj) + sys.getsizeof(obj)
+    return sys.getsizeof(obj)
+
+
+def _model_nbytes(model):
+    """Size of the fitted trees' node and value arrays"""
+    if model is None:
+        return 0
+    return sum(
+        est.tree_.__getstate__()['nodes'].nbytes + est.tree_.value.nbytes
+        for est in getattr(model, 'estimators_', [])
+    )
+
+
+def feature_cache_stats():
+    """Hit/miss/eviction counters of the predict_occupancy_at_time feature cache"""
+    return FEATURE_CACHE.stats()
+
+
+def memory_report():
+    """
+    Report memory held by the loaded model and data, in MB
+    
+    Returns:
+        dict of component -> megabytes (empty if nothing is loaded)
+    """
+    runtime = active_snapshot()
+    if runtime is None:
+        return {}
+    
+    components = {
+        'model': _model_nbytes(runtime['model']),
+        'flat_forest': runtime['forest'].nbytes,
+        'historical_df': _nbytes(runtime['historical_df']),
+        'historical_cube': _nbytes(runtime['historical_cube']),
+        'lag_index': _nbytes(runtime['lag_index']),
+        'events_df': _nbytes(runtime['events_df']),
+        'event_index': _nbytes(runtime['event_index']),
+        'prediction_grid': runtime['grid']['values'].nbytes if runtime['grid'] is not None else 0
+    }
+    components['total'] = sum(components.values())
+    return {name: round(size / (1024 * 1024), 3) for name, size in components.items()}
+
+
+def _score(runtime, features):
+    """
+    Predict occupancy with an uncertainty estimate from the spread of the trees
+    
+    Args:
+        runtime: Runtime dict whose forest to use
+        features: Feature rows, shape (n, 15)
+    
+    Returns:
+        dict of arrays: occupancy_rate, occupancy_std, occupancy_lower and
+        occupancy_upper (all clipped to [0, 1]) and confidence (0-100)
+    """
+    distribution = runtime['forest'].predict_distribution(features, PREDICTION_QUANTILES)
+    lower = np.clip(distribution['lower'], 0.0, 1.0)
+    upper = np.clip(distribution['upper'], 0.0, 1.0)
+    
+    return {
+        'occupancy_rate': np.clip(distribution['mean'], 0.0, 1.0),
+        'occupancy_std': distribution['std'],
+        'occupancy_lower': lower,
+        'occupancy_upper': upper,
+        'confidence': _interval_confidence(lower, upper)
+    }
+
+
+def score_batch(runtime, zone_ids, target_datetimes):
+    """
+    Build features for many (zone, time) pairs and score them in one model call
+    
+    Args:
+        runtime: Runtime snapshot (or any mapping with forest, historical_cube,
+            lag_index and event_index)
+        zone_ids: Zone identifiers
+        target_datetimes: Target datetimes (same length as zone_ids)
+    
+    Returns:
+        dict of arrays as returned by _score
+    """
+    features = extract_features_batch(
+        zone_ids,
+        target_datetimes,
+        runtime.get('historical_df'),
+        runtime.get('events_df'),
+        cube=runtime['historical_cube'],
+        lag_index=runtime['lag_index'],
+        event_index=runtime['event_index']
+    )
+    return _score(runtime, features)
+
+
+def _interval_confidence(lower, upper):
+    """Confidence (0-100) from the prediction interval: a narrow interval means the trees agree"""
+    return np.rint(np.clip(1.0 - (np.asarray(upper) - np.asarray(lower)), 0.0, 1.0) * 100).astype(int)
+
+
+def build_prediction_grid(runtime):
+    """
+    Score every zone x month x weekly hour (without events) with the runtime's model
+    
+    Uses an event-free week beyond the lag horizon of the loaded history,
+    where features depend only on the slot; the month column is then set
+    directly. Event days are always scored live.
+    
+    Args:
+        runtime: Runtime dict from build_runtime
+    
+    Returns:
+        (grid, metadata): float32 array (zones, 12, 7, 24, len(GRID_STATS))
+        and a JSON-serializable dict for save_prediction_grid
+    """
+    historical_df = runtime['historical_df']
+    zones = list(runtime['historical_cube']['zone_index'])
+    week = pd.date_range(grid_week_start(historical_df), periods=7 * 24, freq='h')
+    
+    features = extract_features_batch(
+        np.repeat(zones, len(week)),
+        np.tile(week, len(zones)),
+        historical_df,
+        runtime['events_df'].iloc[:0],
+        cube=runtime['historical_cube'],
+        lag_index=runtime['lag_index'],
+        event_index={}
+    )
+    
+    # Rows ordered (month, zone, weekly hour)
+    month_col = FEATURE_NAMES.index('month')
+    blocks = []
+    for month in range(1, 13):
+        block = features.copy()
+        block[:, month_col] = month
+        blocks.append(block)
+    
+    scores = _score(runtime, np.concatenate(blocks))
+    stats = np.stack([scores[stat] for stat in GRID_STATS], axis=-1)
+    grid = stats.reshape(12, len(zones), 7, 24, len(GRID_STATS)).transpose(1, 0, 2, 3, 4)
+    
+    metadata = {
+        'built_at': datetime.now().isoformat(),
+        'model_version': runtime['version'],
+        'zones': zones,
+        'stats': list(GRID_STATS),
+        'shape': list(grid.shape),
+        'history': history_signature(historical_df)
+    }
+    return np.ascontiguousarray(grid, dtype=np.float32), metadata
 
 
 def predict_occupancy(zone_id, hours_ahead=1):
@@ -60,7 +489,7 @@ def predict_occupancy(zone_id, hours_ahead=1):
         dict with prediction results
     """
     # Load model if not already loaded
-    load_model()
+    runtime = load_model()
     
     # Calculate target datetime
     current_time = datetime.now()
@@ -70,15 +499,16 @@ def predict_occupancy(zone_id, hours_ahead=1):
     features = extract_all_features(
         zone_id,
         target_time,
-        HISTORICAL_DF,
-        EVENTS_DF
+        runtime['historical_df'],
+        runtime['events_df'],
+        cube=runtime['historical_cube'],
+        lag_index=runtime['lag_index'],
+        event_index=runtime['event_index']
     )
     
-    # Make prediction
-    occupancy_rate = MODEL.predict([features])[0]
-    
-    # Ensure prediction is in valid range [0, 1]
-    occupancy_rate = max(0.0, min(1.0, occupancy_rate))
+    # Make prediction (clipped to valid range [0, 1])
+    scores = _score(runtime, [features])
+    occupancy_rate = scores['occupancy_rate'][0]
     
     # Get zone metadata
     zone_info = ZONE_METADATA.get(zone_id, {})
@@ -88,23 +518,75 @@ def predict_occupancy(zone_id, hours_ahead=1):
     availability_percent = (1 - occupancy_rate) * 100
     available_spaces = int((1 - occupancy_rate) * total_spaces)
     
-    # Calculate confidence (simplified - based on prediction variance)
-    # In production, you'd use prediction intervals from the forest
-    confidence = 85  # Simplified for hackathon
-    
     return {
         'zone_id': zone_id,
         'zone_name': zone_info.get('name', zone_id),
         'prediction_time': target_time.isoformat(),
         'occupancy_rate': float(occupancy_rate),
+        'occupancy_std': float(scores['occupancy_std'][0]),
+        'occupancy_interval': [float(scores['occupancy_lower'][0]), float(scores['occupancy_upper'][0])],
         'availability_percent': float(availability_percent),
         'available_spaces': available_spaces,
         'total_spaces': total_spaces,
-        'confidence': confidence,
+        'confidence': int(scores['confidence'][0]),
         'hours_ahead': hours_ahead
     }
 
 
+def _predict_batch(zone_ids, target_times, hours_ahead):
+    """
+    Score many (zone, time) pairs with one feature build and one model call
+    
+    Args:
+        zone_ids: List of zone identifiers
+        target_times: List of target datetimes (same length as zone_ids)
+        hours_ahead: List of hours-ahead values to echo back
+    
+    Returns:
+        list of prediction dicts in input order
+    """
+    runtime = load_model()
+    
+    if len(zone_ids) == 0:
+        return []
+    
+    features = extract_features_batch(
+        zone_ids,
+        target_times,
+        runtime['historical_df'],
+        runtime['events_df'],
+        cube=runtime['historical_cube'],
+        lag_index=runtime['lag_index'],
+        event_index=runtime['event_index']
+    )
+    
+    # Make predictions (clipped to valid range [0, 1])
+    scores = _score(runtime, features)
+    occupancy_rates = scores['occupancy_rate']
+    
+    zone_infos = [ZONE_METADATA.get(zone_id, {}) for zone_id in zone_ids]
+    total_spaces = np.array([info.get('capacity', 20) for info in zone_infos])
+    availability_percent = (1 - occupancy_rates) * 100
+    available_spaces = ((1 - occupancy_rates) * total_spaces).astype(int)
+    
+    return [
+        {
+            'zone_id': zone_id,
+            'zone_name': zone_info.get('name', zone_id),
+            'prediction_time': target_time.isoformat(),
+            'occupancy_rate': float(occupancy_rates[i]),
+            'occupancy_std': float(scores['occupancy_std'][i]),
+            'occupancy_interval': [float(scores['occupancy_lower'][i]), float(scores['occupancy_upper'][i])],
+            'availability_percent': float(availability_percent[i]),
+            'available_spaces': int(available_spaces[i]),
+            'total_spaces': int(total_spaces[i]),
+            'confidence': int(scores['confidence'][i]),
+            'hours_ahead': hours_ahead[i]
+        }
+        for i, (zone_id, zone_info, target_time) in enumerate(zip(zone_ids, zone_infos, target_times))
+    ]
+
+
 def predict_multiple_zones(zone_ids, hours_ahead=1):
     """
     Predict for multiple zones at once
@@ -116,7 +598,9 @@ def predict_multiple_zones(zone_ids, hours_ahead=1):
     Returns:
         list of prediction dicts
     """
-    return [predict_occupancy(zone_id, hours_ahead) for zone_id in zone_ids]
+    zone_ids = list(zone_ids)
+    target_time = datetime.now() + timedelta(hours=hours_ahead)
+    return _predict_batch(zone_ids, [target_time] * len(zone_ids), [hours_ahead] * len(zone_ids))
 
 
 def predict_time_series(zone_id, hours_list=[1, 2, 3, 4]):
@@ -130,10 +614,26 @@ def predict_time_series(zone_id, hours_list=[1, 2, 3, 4]):
     Returns:
         list of predictions
     """
-    return [predict_occupancy(zone_id, hours) for hours in hours_list]
+    hours_list = list(hours_list)
+    current_time = datetime.now()
+    target_times = [current_time + timedelta(hours=hours) for hours in hours_list]
+    return _predict_batch([zone_id] * len(hours_list), target_times, hours_list)
+
 
+def _grid_scores(runtime, zone_id, target_datetime):
+    """Precomputed scores for an event-free slot covered by the grid, else None"""
+    if runtime['grid'] is None:
+        return None
+    if (zone_id, target_datetime.date()) in runtime['event_index']:
+        return None
+    
+    scores = grid_lookup(runtime['grid'], zone_id, target_datetime)
+    if scores is not None:
+        scores['confidence'] = _interval_confidence(scores['occupancy_lower'], scores['occupancy_upper'])
+    return scores
 
-def predict_occupancy_at_time(zone_id, target_datetime, model_path=None, data_dir=None):
+
+def predict_occupancy_at_time(zone_id, target_datetime, model_path=None, data_dir=None, allow_grid=False):
     """
     Predict occupancy for a zone at a specific datetime. Used by the backend API.
 
@@ -142,27 +642,48 @@ def predict_occupancy_at_time(zone_id, target_datetime, model_path=None, data_di
         target_datetime: datetime to predict for
         model_path: Optional path to parking_model.pkl
         data_dir: Optional directory containing parking_data.json and events.json
+        allow_grid: Answer event-free slots outside the history's lag horizon
+            from the precomputed prediction grid, if one is loaded
 
     Returns:
-        dict with occupancy_rate (0-1), availability_percent, confidence, etc.
+        dict with occupancy_rate (0-1), availability_percent, confidence,
+        source ('grid' or 'model'), etc.
     """
-    load_model(model_path=model_path, data_dir=data_dir)
+    runtime = load_model(model_path=model_path, data_dir=data_dir)
 
-    features = extract_all_features(
-        zone_id,
-        target_datetime,
-        HISTORICAL_DF,
-        EVENTS_DF
-    )
+    scores = _grid_scores(runtime, zone_id, target_datetime) if allow_grid else None
+    source = 'grid'
+    if scores is None:
+        source = 'model'
+        
+        # Backend requests are hour-aligned, so popular (zone, hour) slots hit the cache
+        cache_key = (zone_id, target_datetime, runtime['data_version'])
+        features = FEATURE_CACHE.get(cache_key)
+        if features is None:
+            features = tuple(extract_all_features(
+                zone_id,
+                target_datetime,
+                runtime['historical_df'],
+                runtime['events_df'],
+                cube=runtime['historical_cube'],
+                lag_index=runtime['lag_index'],
+                event_index=runtime['event_index']
+            ))
+            FEATURE_CACHE.put(cache_key, features)
+
+        scores = {name: values[0] for name, values in _score(runtime, [features]).items()}
+    
+    return _at_time_result(zone_id, target_datetime, scores, source)
 
-    occupancy_rate = float(MODEL.predict([features])[0])
-    occupancy_rate = max(0.0, min(1.0, occupancy_rate))
+
+def _at_time_result(zone_id, target_datetime, scores, source):
+    """Result dict of predict_occupancy_at_time from one row of scores"""
+    occupancy_rate = float(scores['occupancy_rate'])
 
     zone_info = ZONE_METADATA.get(zone_id, {})
     total_spaces = zone_info.get('capacity', 20)
     availability_percent = (1 - occupancy_rate) * 100
     available_spaces = int((1 - occupancy_rate) * total_spaces)
-    confidence = 85
 
     return {
         'zone_id': zone_id,
@@ -170,13 +691,65 @@ def predict_occupancy_at_time(zone_id, target_datetime, model_path=None, data_di
         'prediction_time': target_datetime.isoformat(),
         'occupancy_rate': occupancy_rate,
         'occupancy_percent': occupancy_rate * 100,
+        'occupancy_std': float(scores['occupancy_std']),
+        'occupancy_interval': [float(scores['occupancy_lower']), float(scores['occupancy_upper'])],
         'availability_percent': availability_percent,
         'available_spaces': available_spaces,
         'total_spaces': total_spaces,
-        'confidence': confidence,
+        'confidence': int(scores['confidence']),
+        'source': source,
     }
 
 
+def predict_occupancy_batch(zone_ids, target_datetimes, model_path=None, data_dir=None,
+                            allow_grid=False, pool=None):
+    """
+    Predict occupancy for many (zone, datetime) pairs in one pass.
+
+    Batch counterpart of predict_occupancy_at_time: grid-covered slots are
+    looked up, all remaining rows share one feature build and one model call.
+
+    Args:
+        zone_ids: Zone identifiers (e.g. 'BF_001')
+        target_datetimes: datetimes to predict for (same length as zone_ids)
+        model_path: Optional path to parking_model.pkl
+        data_dir: Optional directory containing parking_data.json and events.json
+        allow_grid: Answer event-free slots from the prediction grid when covered;
+            a bool for all rows or a sequence of bools, one per row
+        pool: Optional InferencePool; used if it serves the active runtime
+
+    Returns:
+        list of result dicts (as from predict_occupancy_at_time) in input order
+    """
+    runtime = load_model(model_path=model_path, data_dir=data_dir)
+    zone_ids = list(zone_ids)
+    target_datetimes = list(target_datetimes)
+    if isinstance(allow_grid, bool):
+        allow_grid = [allow_grid] * len(zone_ids)
+
+    scores = [
+        _grid_scores(runtime, zone_id, target_datetime) if allow else None
+        for zone_id, target_datetime, allow in zip(zone_ids, target_datetimes, allow_grid)
+    ]
+    sources = ['grid' if row is not None else 'model' for row in scores]
+
+    live = [i for i, row in enumerate(scores) if row is None]
+    if live:
+        live_zones = [zone_ids[i] for i in live]
+        live_times = [target_datetimes[i] for i in live]
+        if pool is not None and pool.data_version == runtime['data_version']:
+            batch = pool.score(live_zones, live_times)
+        else:
+            batch = score_batch(runtime, live_zones, live_times)
+        for j, i in enumerate(live):
+            scores[i] = {name: values[j] for name, values in batch.items()}
+
+    return [
+        _at_time_result(zone_id, target_datetime, row, source)
+        for zone_id, target_datetime, row, source in zip(zone_ids, target_datetimes, scores, sources)
+    ]
+
+
 # Test function
 if __name__ == "__main__":
     print("Testing prediction function...")
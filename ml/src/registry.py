@@ -0,0 +1,175 @@
+"""
+Versioned model registry
+
+Layout:
+    <registry_dir>/<version>/parking_model.pkl
+    <registry_dir>/<version>/parking_model_forest/
+    <registry_dir>/<version>/parking_model_grid.npy, parking_model_grid.json (optional)
+    <registry_dir>/<version>/model_metadata.json
+    <registry_dir>/ACTIVE            (name of the version being served)
+"""
+import os
+import json
+import shutil
+import argparse
+from datetime import datetime
+
+
+MODEL_FILE = 'parking_model.pkl'
+FOREST_DIR = 'parking_model_forest'
+GRID_FILES = ('parking_model_grid.npy', 'parking_model_grid.json')
+METADATA_FILE = 'model_metadata.json'
+ACTIVE_FILE = 'ACTIVE'
+
+
+def default_registry_dir():
+    """ml/models/registry"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(os.path.dirname(script_dir), 'models', 'registry')
+
+
+def list_versions(registry_dir=None):
+    """
+    Registered versions, oldest first
+
+    Args:
+        registry_dir: Registry directory (default: ml/models/registry)
+
+    Returns:
+        list of version names
+    """
+    registry_dir = registry_dir or default_registry_dir()
+    if not os.path.isdir(registry_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(registry_dir)
+        if not name.startswith('.') and os.path.isdir(os.path.join(registry_dir, name))
+    )
+
+
+def get_active_version(registry_dir=None):
+    """Version named in ACTIVE, or None if the registry has no active version"""
+    registry_dir = registry_dir or default_registry_dir()
+    active_file = os.path.join(registry_dir, ACTIVE_FILE)
+    if not os.path.exists(active_file):
+        return None
+    with open(active_file, 'r') as f:
+        version = f.read().strip()
+    return version or None
+
+
+def set_active_version(version, registry_dir=None):
+    """
+    Point ACTIVE at a registered version
+
+    The pointer is written to a temporary file and renamed over ACTIVE, so
+    readers never see a partially written version name.
+
+    Args:
+        version: Registered version name
+        registry_dir: Registry directory (default: ml/models/registry)
+    """
+    registry_dir = registry_dir or default_registry_dir()
+    if version not in list_versions(registry_dir):
+        raise ValueError(f"Unknown model version: {version}")
+
+    tmp_file = os.path.join(registry_dir, f".{ACTIVE_FILE}.tmp")
+    with open(tmp_file, 'w') as f:
+        f.write(version)
+    os.replace(tmp_file, os.path.join(registry_dir, ACTIVE_FILE))
+
+
+def version_model_path(version, registry_dir=None):
+    """Path of parking_model.pkl inside a registered version"""
+    registry_dir = registry_dir or default_registry_dir()
+    return os.path.join(registry_dir, version, MODEL_FILE)
+
+
+def resolve_model_path(version=None, registry_dir=None):
+    """
+    Model path for a version, defaulting to the active one
+
+    Args:
+        version: Registered version name (default: ACTIVE)
+        registry_dir: Registry directory (default: ml/models/registry)
+
+    Returns:
+        (version, model_path), or (None, None) if no version is available
+    """
+    version = version or get_active_version(registry_dir)
+    if version is None:
+        return None, None
+    if version not in list_versions(registry_dir):
+        raise ValueError(f"Unknown model version: {version}")
+    return version, version_model_path(version, registry_dir)
+
+
+def read_metadata(version, registry_dir=None):
+    """model_metadata.json of a registered version ({} if missing)"""
+    registry_dir = registry_dir or default_registry_dir()
+    metadata_file = os.path.join(registry_dir, version, METADATA_FILE)
+    if not os.path.exists(metadata_file):
+        return {}
+    with open(metadata_file, 'r') as f:
+        return json.load(f)
+
+
+def publish_model(models_dir, registry_dir=None, version=None, activate=True):
+    """
+    Copy trained artifacts from models_dir into a new registry version
+
+    Args:
+        models_dir: Directory containing the files written by train.py
+        registry_dir: Registry directory (default: ml/models/registry)
+        version: Version name (default: current timestamp)
+        activate: Point ACTIVE at the new version
+
+    Returns:
+        The new version name
+    """
+    registry_dir = registry_dir or default_registry_dir()
+    version = version or datetime.now().strftime('%Y%m%d-%H%M%S')
+    version_dir = os.path.join(registry_dir, version)
+    if os.path.exists(version_dir):
+        raise ValueError(f"Model version already exists: {version}")
+
+    # Copy into a hidden directory first so a half-copied version is never listed
+    staging_dir = os.path.join(registry_dir, f".{version}.tmp")
+    os.makedirs(staging_dir)
+    for name in (MODEL_FILE, FOREST_DIR, METADATA_FILE) + GRID_FILES:
+        source = os.path.join(models_dir, name)
+        if os.path.isdir(source):
+            shutil.copytree(source, os.path.join(staging_dir, name))
+        elif os.path.exists(source):
+            shutil.copy2(source, os.path.join(staging_dir, name))
+    os.rename(staging_dir, version_dir)
+
+    if activate:
+        set_active_version(version, registry_dir)
+    print(f"✅ Registered model version {version}{' (active)' if activate else ''}")
+    return version
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Manage the versioned model registry")
+    parser.add_argument('--registry-dir', default=None)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help="List registered versions")
+    publish = subparsers.add_parser('publish', help="Register the models in ml/models")
+    publish.add_argument('--models-dir', default=os.path.join(os.path.dirname(script_dir), 'models'))
+    publish.add_argument('--version', default=None)
+    publish.add_argument('--no-activate', action='store_true')
+    activate = subparsers.add_parser('activate', help="Make a registered version active")
+    activate.add_argument('version')
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        active = get_active_version(args.registry_dir)
+        for version in list_versions(args.registry_dir):
+            print(f"{'*' if version == active else ' '} {version}")
+    elif args.command == 'publish':
+        publish_model(args.models_dir, args.registry_dir, args.version, activate=not args.no_activate)
+    else:
+        set_active_version(args.version, args.registry_dir)
+        print(f"✅ Active model version: {args.version}")
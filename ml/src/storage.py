@@ -0,0 +1,306 @@
+"""
+Storage for parking history: columnar (Parquet) with JSON fallback
+"""
+import os
+import glob
+import json
+import shutil
+import argparse
+import pandas as pd
+import numpy as np
+from datetime import timedelta
+
+from features import parse_nearby_zones
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; JSON stays available
+    pa = pc = ds = pq = None
+
+
+PARKING_JSON = 'parking_data.json'
+PARKING_PARQUET_DIR = 'parking_history'
+PARKING_COLUMNS = ['blockface_id', 'datetime', 'occupancy_rate']
+
+
+def iter_json_records(path, chunksize=500_000, block_size=1 << 20):
+    """
+    Stream a JSON array of records as DataFrame chunks
+
+    Reads the file in fixed-size blocks and decodes one record at a time, so
+    memory stays bounded by the chunk size rather than the file size.
+
+    Args:
+        path: Path to a JSON file containing an array of objects
+        chunksize: Records per yielded DataFrame
+        block_size: Bytes read from disk at a time
+
+    Yields:
+        DataFrame chunks in file order
+    """
+    decoder = json.JSONDecoder()
+    records = []
+
+    with open(path, 'r') as f:
+        buffer = f.read(block_size).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"Expected a JSON array in {path}")
+        pos = 1
+
+        while True:
+            # Skip separators between records
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == ']':
+                break
+
+            try:
+                record, pos = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                more = f.read(block_size)
+                if not more:
+                    raise
+                buffer = buffer[pos:] + more
+                pos = 0
+                continue
+
+            records.append(record)
+            if len(records) >= chunksize:
+                yield pd.DataFrame(records)
+                records = []
+
+    if records:
+        yield pd.DataFrame(records)
+
+
+def _typed_chunk(chunk):
+    """Cast a raw parking chunk to storage dtypes and add the month partition key"""
+    chunk = pd.DataFrame({
+        'blockface_id': chunk['blockface_id'].astype(str),
+        'datetime': pd.to_datetime(chunk['datetime']).astype('datetime64[ns]'),
+        'occupancy_rate': chunk['occupancy_rate'].astype(np.float32)
+    })
+    chunk['month'] = chunk['datetime'].dt.strftime('%Y-%m')
+    return chunk
+
+
+def has_columnar_history(data_dir):
+    """True if a Parquet history exists in data_dir and pyarrow is installed"""
+    return pq is not None and os.path.isdir(os.path.join(data_dir, PARKING_PARQUET_DIR))
+
+
+def convert_parking_json(data_dir, chunksize=500_000):
+    """
+    Convert parking_data.json into a Parquet dataset partitioned by zone and month
+
+    Layout: <data_dir>/parking_history/blockface_id=<zone>/month=<YYYY-MM>/*.parquet
+
+    Args:
+        data_dir: Directory containing parking_data.json
+        chunksize: Records converted per streamed chunk
+
+    Returns:
+        Path of the Parquet dataset directory
+    """
+    if pq is None:
+        raise ImportError("pyarrow is required to write columnar parking history")
+
+    json_path = os.path.join(data_dir, PARKING_JSON)
+    out_dir = os.path.join(data_dir, PARKING_PARQUET_DIR)
+    print(f"Converting {json_path} -> {out_dir}")
+    
+    # Build the dataset beside out_dir and swap it in at the end, so partitions
+    # from an earlier conversion never mix with the new ones
+    tmp_dir = out_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    
+    total = 0
+    for i, chunk in enumerate(iter_json_records(json_path, chunksize=chunksize)):
+        table = pa.Table.from_pandas(_typed_chunk(chunk), preserve_index=False)
+        pq.write_to_dataset(
+            table,
+            tmp_dir,
+            partition_cols=['blockface_id', 'month'],
+            basename_template=f"part-{i}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore'
+        )
+        total += len(chunk)
+    os.makedirs(tmp_dir, exist_ok=True)
+    
+    old_dir = out_dir + '.old'
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(out_dir):
+        os.rename(out_dir, old_dir)
+    os.rename(tmp_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    
+    print(f"✅ Wrote {total} records")
+    return out_dir
+
+
+def _history_filter(zones=None, since=None):
+    """Build a pyarrow dataset filter that prunes zone and month partitions"""
+    expression = None
+    if zones is not None:
+        expression = ds.field('blockface_id').isin(list(zones))
+    if since is not None:
+        since = pd.Timestamp(since)
+        # Month partitions prune whole directories, datetime trims the first month
+        since_expr = ((ds.field('month') >= since.strftime('%Y-%m')) &
+                      (ds.field('datetime') >= pa.scalar(since.to_pydatetime(), pa.timestamp('ns'))))
+        expression = since_expr if expression is None else expression & since_expr
+    return expression
+
+
+def latest_columnar_reading(data_dir):
+    """
+    Newest reading time in the Parquet history, reading only the newest month partitions
+
+    Returns:
+        pd.Timestamp, or None if the dataset is empty
+    """
+    dataset_dir = os.path.join(data_dir, PARKING_PARQUET_DIR)
+    months = [
+        os.path.basename(path).split('=', 1)[1]
+        for path in glob.glob(os.path.join(dataset_dir, 'blockface_id=*', 'month=*'))
+    ]
+    if not months:
+        return None
+    table = pq.read_table(
+        dataset_dir, columns=['datetime'], filters=ds.field('month') == max(months)
+    )
+    latest = pc.max(table['datetime']).as_py()
+    return None if latest is None else pd.Timestamp(latest)
+
+
+def load_parking_history(data_dir, columns=None, zones=None, since=None, weeks=None):
+    """
+    Load parking history, preferring the Parquet dataset over JSON
+
+    Args:
+        data_dir: Directory containing parking_history/ and/or parking_data.json
+        columns: Columns to read (default: blockface_id, datetime, occupancy_rate)
+        zones: Optional list of zone ids to read
+        since: Optional datetime; only readings at or after it are read
+        weeks: Optional number of weeks to keep, counted back from the
+            newest reading (not from today, so static history still loads)
+
+    Returns:
+        DataFrame with parsed datetime column
+    """
+    columns = list(columns or PARKING_COLUMNS)
+
+    if has_columnar_history(data_dir):
+        if weeks:
+            latest = latest_columnar_reading(data_dir)
+            if latest is not None:
+                cutoff = history_since(weeks, latest)
+                since = cutoff if since is None else max(pd.Timestamp(since), cutoff)
+        table = pq.read_table(
+            os.path.join(data_dir, PARKING_PARQUET_DIR),
+            columns=columns,
+            filters=_history_filter(zones, since),
+            memory_map=True
+        )
+        df = table.to_pandas()
+        if 'blockface_id' in df:
+            df['blockface_id'] = df['blockface_id'].astype(str)
+        return df
+
+    # JSON fallback
+    df = pd.read_json(os.path.join(data_dir, PARKING_JSON))
+    df['datetime'] = pd.to_datetime(df['datetime'])
+    if zones is not None:
+        df = df[df['blockface_id'].isin(list(zones))]
+    if since is not None:
+        df = df[df['datetime'] >= pd.Timestamp(since)]
+    if weeks and len(df):
+        df = df[df['datetime'] >= history_since(weeks, df['datetime'].max())]
+    return df[columns].reset_index(drop=True)
+
+
+def iter_parking_chunks(data_dir, chunksize=500_000):
+    """
+    Stream parking history in chunks from Parquet if present, else JSON
+
+    Args:
+        data_dir: Directory containing parking_history/ and/or parking_data.json
+        chunksize: Records per yielded DataFrame
+
+    Yields:
+        DataFrame chunks with blockface_id, datetime, occupancy_rate
+    """
+    if has_columnar_history(data_dir):
+        dataset = ds.dataset(os.path.join(data_dir, PARKING_PARQUET_DIR), format='parquet', partitioning='hive')
+        for batch in dataset.to_batches(columns=PARKING_COLUMNS, batch_size=chunksize):
+            if batch.num_rows:
+                yield batch.to_pandas()
+    else:
+        yield from iter_json_records(os.path.join(data_dir, PARKING_JSON), chunksize=chunksize)
+
+
+def compact_historical_df(df):
+    """
+    Shrink parking history for long-lived serving processes
+
+    Keeps only the columns features need: blockface_id as a categorical,
+    datetime as datetime64[ns] and occupancy_rate as float32.
+
+    Args:
+        df: Parking history DataFrame
+
+    Returns:
+        Compacted DataFrame
+    """
+    return pd.DataFrame({
+        'blockface_id': df['blockface_id'].astype('category'),
+        'datetime': pd.to_datetime(df['datetime']).values.astype('datetime64[ns]'),
+        'occupancy_rate': df['occupancy_rate'].values.astype(np.float32)
+    })
+
+
+def compact_events_df(df):
+    """
+    Shrink the events table for long-lived serving processes
+
+    Parses date + start_time once into a datetime64 event_start column,
+    normalizes nearby_zones to lists and stores repeated labels as categoricals.
+
+    Args:
+        df: Events DataFrame as loaded from events.json
+
+    Returns:
+        Compacted DataFrame
+    """
+    if len(df) == 0:
+        return df
+
+    events = pd.DataFrame({
+        'event_id': df['event_id'].astype(str),
+        'event_start': pd.to_datetime(df['date'] + ' ' + df['start_time']).astype('datetime64[ns]'),
+        'nearby_zones': df['nearby_zones'].map(parse_nearby_zones)
+    })
+    for column in ('event_type', 'venue', 'impact_level'):
+        if column in df:
+            events[column] = df[column].astype('category')
+    if 'expected_attendance' in df:
+        events['expected_attendance'] = df['expected_attendance'].fillna(0).astype(np.int32)
+    return events
+
+
+def history_since(weeks, latest):
+    """Start of the last N weeks of history ending at latest (None = everything)"""
+    return None if not weeks else pd.Timestamp(latest) - timedelta(weeks=weeks)
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Convert parking_data.json to partitioned Parquet")
+    parser.add_argument('--data-dir', default=os.path.join(os.path.dirname(script_dir), 'data', 'processed'))
+    parser.add_argument('--chunksize', type=int, default=500_000)
+    args = parser.parse_args()
+
+    convert_parking_json(args.data_dir, chunksize=args.chunksize)
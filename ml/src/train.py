@@ -8,10 +8,21 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, r2_score, mean_squared_error
 import joblib
 import json
+import os
+import shutil
+import argparse
+import resource
+import tracemalloc
 from datetime import datetime
 
 from config import MODEL_PARAMS, MODEL_PATH, FEATURE_NAMES
 from features import create_training_dataset
+from storage import load_parking_history, iter_parking_chunks
+from forest import FlatForest, model_fingerprint
+from benchmark import time_call
+from registry import publish_model
+from grid import save_prediction_grid
+from predict import build_runtime, build_prediction_grid
 
 
 def load_data():
@@ -24,10 +35,8 @@ def load_data():
     ml_dir = os.path.dirname(script_dir)
     data_dir = os.path.join(ml_dir, 'data', 'processed')
     
-    # Load parking data
-    parking_path = os.path.join(data_dir, 'parking_data.json')
-    parking_df = pd.read_json(parking_path)
-    parking_df['datetime'] = pd.to_datetime(parking_df['datetime'])
+    # Load parking data (Parquet history if converted, else parking_data.json)
+    parking_df = load_parking_history(data_dir)
     
     # Load events - use json.load to preserve list types
     import json
@@ -42,6 +51,95 @@ def load_data():
     return parking_df, events_df
 
 
+def _report_memory(stage):
+    """Print the traced peak for the current stage and the process peak RSS"""
+    _, traced_peak = tracemalloc.get_traced_memory()
+    # ru_maxrss is KiB on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"  [{stage}] peak allocated: {traced_peak / (1024 * 1024):.1f} MB, "
+          f"process peak RSS: {peak_rss:.1f} MB")
+    tracemalloc.reset_peak()
+
+
+def build_training_arrays(data_dir, events_df, out_dir, chunksize=500_000):
+    """
+    Build X and y out of core as float32 .npy files
+    
+    Stage 1 streams parking records and spills them into per-zone partition
+    files. Stage 2 builds features one zone at a time (every feature depends
+    only on its own zone's history) and writes them into memory-mapped
+    X.npy / y.npy, so at most one zone is materialized in RAM.
+    
+    Args:
+        data_dir: Directory containing parking_history/ or parking_data.json
+        events_df: Events dataframe
+        out_dir: Directory for X.npy, y.npy and temporary partitions
+        chunksize: Records per streamed chunk
+    
+    Returns:
+        (X_path, y_path)
+    """
+    print("Building training arrays out of core...")
+    os.makedirs(out_dir, exist_ok=True)
+    partitions_dir = os.path.join(out_dir, 'partitions')
+    shutil.rmtree(partitions_dir, ignore_errors=True)
+    os.makedirs(partitions_dir)
+    tracemalloc.start()
+    
+    # Stage 1: stream records into per-zone partitions
+    print("Stage 1: partitioning records by zone...")
+    zone_counts = {}
+    for chunk in iter_parking_chunks(data_dir, chunksize=chunksize):
+        times = pd.to_datetime(chunk['datetime']).values.astype('datetime64[ns]').view(np.int64)
+        occupancy = chunk['occupancy_rate'].values.astype(np.float32)
+        codes, zones = pd.factorize(chunk['blockface_id'])
+        
+        for code, zone_id in enumerate(zones):
+            rows = codes == code
+            with open(os.path.join(partitions_dir, f"{zone_id}.times"), 'ab') as f:
+                times[rows].tofile(f)
+            with open(os.path.join(partitions_dir, f"{zone_id}.occupancy"), 'ab') as f:
+                occupancy[rows].tofile(f)
+            zone_counts[zone_id] = zone_counts.get(zone_id, 0) + int(rows.sum())
+    
+    n_rows = sum(zone_counts.values())
+    print(f"  {n_rows} records in {len(zone_counts)} zones")
+    _report_memory('partition')
+    
+    # Stage 2: build features zone by zone into memory-mapped arrays
+    print("Stage 2: building features per zone...")
+    X_path = os.path.join(out_dir, 'X.npy')
+    y_path = os.path.join(out_dir, 'y.npy')
+    X = np.lib.format.open_memmap(X_path, mode='w+', dtype=np.float32, shape=(n_rows, len(FEATURE_NAMES)))
+    y = np.lib.format.open_memmap(y_path, mode='w+', dtype=np.float32, shape=(n_rows,))
+    
+    offset = 0
+    for zone_id in sorted(zone_counts):
+        zone_df = pd.DataFrame({
+            'blockface_id': zone_id,
+            'datetime': np.fromfile(
+                os.path.join(partitions_dir, f"{zone_id}.times"), dtype=np.int64
+            ).view('datetime64[ns]'),
+            'occupancy_rate': np.fromfile(
+                os.path.join(partitions_dir, f"{zone_id}.occupancy"), dtype=np.float32
+            )
+        })
+        X_zone, y_zone = create_training_dataset(zone_df, events_df, verbose=False)
+        X[offset:offset + len(X_zone)] = X_zone
+        y[offset:offset + len(y_zone)] = y_zone
+        offset += len(X_zone)
+    
+    X.flush()
+    y.flush()
+    del X, y
+    shutil.rmtree(partitions_dir)
+    _report_memory('features')
+    tracemalloc.stop()
+    
+    print(f"✅ Wrote {n_rows} training samples to {out_dir}")
+    return X_path, y_path
+
+
 def train_model(X_train, y_train):
     """Train Random Forest model"""
     print("\nTraining Random Forest model...")
@@ -82,6 +180,63 @@ def evaluate_model(model, X_test, y_test):
     }
 
 
+def reduce_trees(model, n_trees):
+    """
+    Keep only the first n_trees trees of a fitted forest
+    
+    Args:
+        model: Fitted RandomForestRegressor
+        n_trees: Number of trees to keep
+    
+    Returns:
+        The same model, truncated in place
+    """
+    if n_trees < len(model.estimators_):
+        print(f"\nReducing forest from {len(model.estimators_)} to {n_trees} trees")
+        model.estimators_ = model.estimators_[:n_trees]
+        model.n_estimators = n_trees
+    return model
+
+
+def tree_count_tradeoff(model, X_test, y_test, tree_counts=(10, 25, 50, 100), repeats=20):
+    """
+    Report accuracy, artifact size and latency for smaller forests
+    
+    Evaluates the first K trees of the float32 flat forest for each K.
+    
+    Args:
+        model: Fitted RandomForestRegressor
+        X_test, y_test: Held-out data
+        tree_counts: Tree counts to evaluate (capped at the trained count)
+        repeats: Timed calls per latency measurement
+    
+    Returns:
+        list of dicts with n_trees, mae, size_mb, latency_1_ms, latency_1000_ms
+    """
+    print("\nTree count trade-off (float32 flat forest):")
+    print(f"  {'trees':>6} {'MAE':>8} {'size MB':>9} {'1 row ms':>9} {'1k rows ms':>11}")
+    
+    forest = FlatForest.from_sklearn(model).to_float32()
+    X_test = np.asarray(X_test, dtype=np.float32)
+    counts = sorted({min(k, forest.n_trees) for k in tree_counts})
+    
+    report = []
+    for n_trees in counts:
+        subset = forest.subset(n_trees)
+        row = {
+            'n_trees': n_trees,
+            'mae': float(mean_absolute_error(y_test, subset.predict(X_test))),
+            'size_mb': round(subset.nbytes / (1024 * 1024), 3),
+            'latency_1_ms': round(time_call(subset.predict, X_test[:1], repeats), 3),
+            'latency_1000_ms': round(time_call(subset.predict, X_test[:1000], repeats), 3)
+        }
+        print(f"  {row['n_trees']:>6} {row['mae']:>8.4f} {row['size_mb']:>9.2f} "
+              f"{row['latency_1_ms']:>9.3f} {row['latency_1000_ms']:>11.3f}")
+        report.append(row)
+    
+    return report
+
+
 def get_feature_importance(model):
     """Get and display feature importance"""
     print("\nFeature Importance:")
@@ -96,7 +251,7 @@ def get_feature_importance(model):
     return dict(feature_importance)
 
 
-def save_model(model, metrics, feature_importance):
+def save_model(model, metrics, feature_importance, tree_tradeoff=None):
     """Save trained model and metadata"""
     print(f"\nSaving model to {MODEL_PATH}...")
     
@@ -109,51 +264,132 @@ def save_model(model, metrics, feature_importance):
     # Ensure directory exists
     os.makedirs(models_dir, exist_ok=True)
     
+    trained_at = datetime.now().isoformat()
+    
     # Save model
     model_file = os.path.join(models_dir, 'parking_model.pkl')
     joblib.dump(model, model_file)
     print(f"Model saved: {model_file}")
     
+    # Save float32 node arrays as uncompressed .npy files that serving
+    # processes memory-map instead of unpickling the model; the pickle's
+    # fingerprint lets serving detect a forest left over from another model
+    forest_dir = os.path.join(models_dir, 'parking_model_forest')
+    if os.path.isdir(forest_dir):
+        shutil.rmtree(forest_dir)
+    forest = FlatForest.from_sklearn(model).to_float32()
+    forest.save(forest_dir, source=model_fingerprint(model_file, trained_at))
+    print(f"Flat forest saved: {forest_dir} ({forest.nbytes / (1024 * 1024):.1f} MB)")
+    
     # Save metadata
     metadata = {
-        'trained_at': datetime.now().isoformat(),
+        'trained_at': trained_at,
         'model_type': 'RandomForestRegressor',
         'model_params': MODEL_PARAMS,
+        'n_trees': len(model.estimators_),
         'features': FEATURE_NAMES,
         'metrics': metrics,
-        'feature_importance': feature_importance
+        'feature_importance': feature_importance,
+        'tree_tradeoff': tree_tradeoff or []
     }
     
     metadata_file = os.path.join(models_dir, 'model_metadata.json')
     with open(metadata_file, 'w') as f:
         json.dump(metadata, f, indent=2)
     print(f"Metadata saved: {metadata_file}")
+    
+    return models_dir
+
+
+def save_grid(models_dir, data_dir=None):
+    """
+    Precompute the weekly prediction grid for the saved model
+    
+    Loads the model and history the way serving does, so the grid matches
+    what predict_occupancy_at_time would compute.
+    
+    Args:
+        models_dir: Directory returned by save_model
+        data_dir: Data directory (default: ml/data/processed)
+    """
+    print("\nBuilding prediction grid...")
+    model_file = os.path.join(models_dir, 'parking_model.pkl')
+    runtime = build_runtime(model_path=model_file, data_dir=data_dir)
+    grid, metadata = build_prediction_grid(runtime)
+    save_prediction_grid(grid, metadata, model_file)
 
 
 def main():
     """Main training pipeline"""
+    parser = argparse.ArgumentParser(description="Train the parking prediction model")
+    parser.add_argument('--out-of-core', action='store_true',
+                        help="Stream records into memory-mapped float32 feature arrays")
+    parser.add_argument('--work-dir', default=None,
+                        help="Directory for out-of-core arrays (default: ml/data/processed/training)")
+    parser.add_argument('--chunksize', type=int, default=500_000,
+                        help="Records per streamed chunk in out-of-core mode")
+    parser.add_argument('--n-trees', type=int, default=None,
+                        help="Keep only the first N trained trees in the saved model")
+    parser.add_argument('--tradeoff', action='store_true',
+                        help="Report MAE, artifact size and latency for 10/25/50/100 trees")
+    parser.add_argument('--grid', action='store_true',
+                        help="Precompute predictions for every zone x month x weekly hour (event-free)")
+    parser.add_argument('--register', action='store_true',
+                        help="Publish the saved model as a new active registry version")
+    args = parser.parse_args()
+    
     print("="*60)
     print("PARKING PREDICTION MODEL TRAINING")
     print("="*60)
     
-    # Load data
-    parking_df, events_df = load_data()
-    
-    # Create features
-    print("\nCreating features...")
-    X, y = create_training_dataset(parking_df, events_df)
-    
-    # Split data
-    print(f"\nSplitting data (80% train, 20% test)...")
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
+    if args.out_of_core:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        data_dir = os.path.join(os.path.dirname(script_dir), 'data', 'processed')
+        work_dir = args.work_dir or os.path.join(data_dir, 'training')
+        
+        with open(os.path.join(data_dir, 'events.json'), 'r') as f:
+            events_df = pd.DataFrame(json.load(f))
+        
+        X_path, y_path = build_training_arrays(
+            data_dir, events_df, work_dir, chunksize=args.chunksize
+        )
+        X = np.load(X_path, mmap_mode='r')
+        y = np.load(y_path, mmap_mode='r')
+        
+        # Split indices rather than arrays so only the selected rows are
+        # read from the mapped files
+        print(f"\nSplitting data (80% train, 20% test)...")
+        train_idx, test_idx = train_test_split(
+            np.arange(len(y)), test_size=0.2, random_state=42
+        )
+        train_idx.sort()
+        test_idx.sort()
+        X_train, y_train = X[train_idx], y[train_idx]
+        X_test, y_test = X[test_idx], y[test_idx]
+    else:
+        # Load data
+        parking_df, events_df = load_data()
+        
+        # Create features
+        print("\nCreating features...")
+        X, y = create_training_dataset(parking_df, events_df)
+        
+        # Split data
+        print(f"\nSplitting data (80% train, 20% test)...")
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42
+        )
     print(f"Training set: {len(X_train)} samples")
     print(f"Test set: {len(X_test)} samples")
     
     # Train model
     model = train_model(X_train, y_train)
     
+    # Optional accuracy / size / latency report before reducing the forest
+    tree_tradeoff = tree_count_tradeoff(model, X_test, y_test) if args.tradeoff else None
+    if args.n_trees:
+        model = reduce_trees(model, args.n_trees)
+    
     # Evaluate
     metrics = evaluate_model(model, X_test, y_test)
     
@@ -161,7 +397,11 @@ def main():
     feature_importance = get_feature_importance(model)
     
     # Save
-    save_model(model, metrics, feature_importance)
+    models_dir = save_model(model, metrics, feature_importance, tree_tradeoff)
+    if args.grid:
+        save_grid(models_dir)
+    if args.register:
+        publish_model(models_dir)
     
     print("\n" + "="*60)
     print("TRAINING COMPLETE!")
@@ -0,0 +1,9 @@
+"""
+Put ml/src on the import path, the same as running the scripts from there
+"""
+import os
+import sys
+
+ML_SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if ML_SRC not in sys.path:
+    sys.path.insert(0, ML_SRC)
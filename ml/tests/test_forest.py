@@ -0,0 +1,48 @@
+"""
+Tests for matching a saved flat forest to its source pickle
+"""
+import os
+import shutil
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+from forest import FlatForest, forest_matches_model, model_fingerprint
+
+
+def _fit(seed):
+    rng = np.random.default_rng(seed)
+    X = rng.random((200, 3))
+    return RandomForestRegressor(n_estimators=3, max_depth=4, random_state=seed).fit(X, X[:, 0])
+
+
+def _export(tmp_path, model, trained_at='2026-01-01T00:00:00'):
+    model_file = str(tmp_path / 'parking_model.pkl')
+    forest_dir = str(tmp_path / 'parking_model_forest')
+    joblib.dump(model, model_file)
+    FlatForest.from_sklearn(model).save(forest_dir, source=model_fingerprint(model_file, trained_at))
+    return model_file, forest_dir
+
+
+def test_forest_matches_its_pickle_and_copies(tmp_path):
+    model_file, forest_dir = _export(tmp_path, _fit(0))
+    assert forest_matches_model(forest_dir, model_file, '2026-01-01T00:00:00')
+
+    # A plain copy changes the mtime but not the content
+    copy_dir = tmp_path / 'copy'
+    copy_dir.mkdir()
+    shutil.copyfile(model_file, copy_dir / 'parking_model.pkl')
+    assert forest_matches_model(forest_dir, str(copy_dir / 'parking_model.pkl'))
+
+
+def test_forest_rejected_for_other_pickle_or_run(tmp_path):
+    model_file, forest_dir = _export(tmp_path, _fit(0))
+    assert not forest_matches_model(forest_dir, model_file, '2026-02-01T00:00:00')
+
+    joblib.dump(_fit(1), model_file)
+    assert not forest_matches_model(forest_dir, model_file)
+
+    # Forests saved without a fingerprint cannot be trusted either
+    FlatForest.from_sklearn(_fit(1)).save(forest_dir)
+    assert not forest_matches_model(forest_dir, model_file)
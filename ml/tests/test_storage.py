@@ -0,0 +1,43 @@
+"""
+Tests for the Parquet parking history conversion
+"""
+import json
+import os
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from storage import PARKING_JSON, convert_parking_json, load_parking_history
+
+
+def _write_records(data_dir, zones, hours):
+    records = [
+        {
+            'blockface_id': zone,
+            'datetime': f"2025-{month:02d}-01 {hour:02d}:00:00",
+            'occupancy_rate': 0.5
+        }
+        for zone in zones
+        for month in (1, 2)
+        for hour in range(hours)
+    ]
+    with open(os.path.join(data_dir, PARKING_JSON), 'w') as f:
+        json.dump(records, f)
+    return len(records)
+
+
+def test_reconversion_replaces_previous_dataset(tmp_path):
+    data_dir = str(tmp_path)
+    _write_records(data_dir, ['BF_001', 'BF_002', 'BF_003'], hours=24)
+    convert_parking_json(data_dir, chunksize=20)
+
+    # Fewer zones and hours than before; nothing from the first run may survive
+    expected = _write_records(data_dir, ['BF_001', 'BF_002'], hours=12)
+    convert_parking_json(data_dir, chunksize=20)
+
+    history = load_parking_history(data_dir)
+    assert len(history) == expected
+    assert set(history['blockface_id']) == {'BF_001', 'BF_002'}
+    assert not os.path.exists(os.path.join(data_dir, 'parking_history.tmp'))
+    assert not os.path.exists(os.path.join(data_dir, 'parking_history.old'))